@@ -0,0 +1,325 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+import chess
+import chess.engine
+from util import *
+from engine_core import EngineCore, StopRule
+
+engine_path = "/data/data/com.termux/files/usr/bin/stockfish"
+
+def legacy_eval_range(board, engine):
+    """The old complexity check: a separate 0.5s search after every legal move. Returns best - worst (None if no score)."""
+    evaluations = []
+    for move in board.legal_moves:
+        board.push(move)
+        analysis = engine.analyse(board, chess.engine.Limit(time=0.5), info=chess.engine.INFO_SCORE)
+        score = analysis["score"].relative.score(mate_score=10000)
+        if score is not None:
+            evaluations.append(score)
+        board.pop()
+
+    if not evaluations:
+        return None
+    return max(evaluations) - min(evaluations)  # Complex when > 150
+
+# Quiet endgames, so the complexity benchmark also has positions the old scan called simple
+QUIET_FENS = [
+    "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1",
+    "4k3/8/8/8/8/8/3PPP2/4K3 w - - 0 1",
+    "8/8/4k3/8/8/8/R7/4K3 w - - 0 1",
+    "8/5pk1/6p1/8/8/6P1/5PK1/8 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/5PPP/6K1 w - - 0 1",
+    "8/8/2k5/8/3K4/3P4/8/8 w - - 0 1",
+]
+
+def legacy_detect_tactics(board, color):
+    """The old tactics scan: board copies for every legal move of every piece."""
+    tactics = {
+        "pins": [],
+        "skewers": [],
+        "forks": [],
+        "discovered_attacks": [],
+        "discovered_checks": [],
+        "double_checks": [],
+        "x_ray_attacks": [],
+        "trapped_pieces": [],
+        "back_rank_mate_threats": [],
+        "stalemate_traps": [],
+        "smothered_mate": [],
+        "deflections": [],
+        "decoys": [],
+        "overloading": [],
+        "interference": [],
+        "zwischenzug": [],
+        "underpromotion_trap": []
+    }
+
+    # Only consider high-value pieces (knight, bishop, rook, queen, king)
+    high_value_pieces = {chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING}
+
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+
+        if piece and piece.color == color and piece.piece_type in high_value_pieces:
+            # PIN DETECTION
+            if board.is_pinned(color, square):
+                tactics["pins"].append(chess.square_name(square))
+
+            # FORK DETECTION
+            attackers = board.attackers(color, square)
+            if len(attackers) > 1:
+                tactics["forks"].append(chess.square_name(square))
+
+            # OVERLOADING DETECTION
+            attackers = list(board.attackers(not color, square))
+            defenders = list(board.attackers(color, square))
+            if len(attackers) > 0 and len(defenders) == 1:
+                tactics["overloading"].append(chess.square_name(square))
+
+            # INTERFERENCE DETECTION (Simplified)
+            for move in board.legal_moves:
+                if move.from_square == square:
+                    temp_board = board.copy()
+                    temp_board.push(move)
+                    if board.is_attacked_by(not color, move.to_square) and not temp_board.is_attacked_by(not color, move.to_square):
+                        tactics["interference"].append(chess.square_name(move.to_square))
+
+            # DECOY DETECTION
+            for move in board.legal_moves:
+                if move.from_square == square:
+                    temp_board = board.copy()
+                    temp_board.push(move)
+                    if temp_board.is_check():
+                        tactics["decoys"].append(chess.square_name(move.to_square))
+
+            # SMOTHERED MATE CHECK
+            if piece.piece_type == chess.KNIGHT:
+                for move in board.legal_moves:
+                    if move.from_square == square:
+                        temp_board = board.copy()
+                        temp_board.push(move)
+                        if temp_board.is_checkmate():
+                            king_square = temp_board.king(not color)
+                            if all(temp_board.piece_at(sq) and temp_board.piece_at(sq).color != color
+                                   for sq in chess.SQUARES if chess.square_distance(king_square, sq) == 1):
+                                tactics["smothered_mate"].append(chess.square_name(king_square))
+
+            # ZWISCHENZUG (In-Between Moves)
+            if piece.piece_type != chess.KING:
+                for move in board.legal_moves:
+                    temp_board = board.copy()
+                    temp_board.push(move)
+                    if temp_board.is_check() and not board.is_check():
+                        tactics["zwischenzug"].append(chess.square_name(move.to_square))
+
+            # UNDERPROMOTION TRAP (Check if promoting to a piece other than queen gives better result)
+            if piece.piece_type == chess.PAWN:
+                if (color == chess.WHITE and chess.square_rank(square) == 6) or (color == chess.BLACK and chess.square_rank(square) == 1):
+                    tactics["underpromotion_trap"].append(chess.square_name(square))
+
+    return tactics
+
+def bench_tactics(fens, repeat):
+    """Time the tactics detector against the old copy-per-move scan on each position."""
+    print(f"\n⚔️ Tactics benchmark ({len(fens)} positions, best of {repeat})")
+    print(f"{'#':>3} {'legacy ms':>10} {'masks ms':>9} {'speedup':>8}  same")
+    legacy_total = fast_total = 0.0
+    for i, fen in enumerate(fens, 1):
+        board = chess.Board(fen)
+        legacy_time = fast_time = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            legacy = legacy_detect_tactics(board, board.turn)
+            legacy_time = min(legacy_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            fast = detect_tactics(board, board.turn)
+            fast_time = min(fast_time, time.perf_counter() - start)
+
+        legacy_total += legacy_time
+        fast_total += fast_time
+        print(f"{i:>3} {legacy_time * 1000:>10.2f} {fast_time * 1000:>9.2f} {legacy_time / fast_time:>7.1f}x  {'✅' if legacy == fast else '❌'}")
+
+    print(f"\n⏱️  Legacy : {legacy_total * 1000 / len(fens):.2f} ms/position")
+    print(f"⚡ Masks  : {fast_total * 1000 / len(fens):.2f} ms/position ({legacy_total / fast_total:.1f}x faster)")
+
+def bench_complexity(engine, fens, time_limit):
+    """Compare the per-move complexity scan with the MultiPV measurement, and calibrate COMPLEX_RANGE against it."""
+    print(f"\n📈 Complexity benchmark ({len(fens)} positions)")
+    print(f"{'#':>3} {'legacy s':>9} {'multipv s':>10} {'legacy':>7} {'range':>6} {'spread':>7} {'entropy':>8} {'pv chg':>7}  match")
+    legacy_total = fast_total = 0.0
+    pairs = []
+    for i, fen in enumerate(fens, 1):
+        board = chess.Board(fen)
+
+        start = time.perf_counter()
+        legacy_range = legacy_eval_range(board, engine)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics = position_complexity(board, engine, time_limit)
+        fast_time = time.perf_counter() - start
+
+        legacy_total += legacy_time
+        fast_total += fast_time
+        legacy = legacy_range is not None and legacy_range > 150
+        pairs.append((legacy, metrics["eval_range"], legacy_range or 0))
+        print(f"{i:>3} {legacy_time:>9.2f} {fast_time:>10.2f} {legacy_range if legacy_range is not None else '-':>7} "
+              f"{metrics['eval_range']:>6} {metrics['top_spread']:>7} {metrics['wdl_entropy']:>8.2f} {metrics['pv_changes']:>7}  "
+              f"{'✅' if legacy == (metrics['eval_range'] > COMPLEX_RANGE) else '❌'}")
+
+    def agreement(threshold):
+        return sum(legacy == (eval_range > threshold) for legacy, eval_range, _ in pairs)
+
+    thresholds = range(50, 401, 10)
+    best = max(agreement(threshold) for threshold in thresholds)
+    calibrated = [threshold for threshold in thresholds if agreement(threshold) == best]
+    print(f"\n⏱️  Legacy   : {legacy_total / len(fens):.2f} s/position")
+    print(f"⚡ MultiPV  : {fast_total / len(fens):.2f} s/position ({legacy_total / max(fast_total, 1e-9):.1f}x faster)")
+    print(f"📏 Range    : {statistics.mean(abs(eval_range - legacy_range) for _, eval_range, legacy_range in pairs):.0f} cp "
+          f"mean difference from the legacy range")
+    print(f"🎯 Agreement: {agreement(COMPLEX_RANGE)}/{len(fens)} at COMPLEX_RANGE={COMPLEX_RANGE} "
+          f"(best {best}/{len(fens)} for thresholds {calibrated[0]}-{calibrated[-1]})")
+
+# Stages of one assistant turn, in main.py's order
+TURN_STAGES = ["adaptive", "search", "blunder", "tactics", "stats"]
+
+def count_engine_calls(engine, counter):
+    """Count the searches (`go` commands) `engine` is sent."""
+    protocol = engine.protocol
+    send_line = protocol.send_line
+
+    def counting_send_line(line):
+        if line.startswith("go"):
+            counter[0] += 1
+        return send_line(line)
+
+    protocol.send_line = counting_send_line
+
+def bench_turns(engine_command, mode, plies, blunder_time):
+    """
+    Play `plies` turns of a simplified version of main.py's loop on one board and time each stage.
+
+    Every turn runs the adaptive adjustment (adaptive mode only), the
+    suggestion search with the mode's stop rule, a blunder ranking (always,
+    its move is not played), the tactics scan and the hand-off of the move
+    to the background StatsWorker, then plays the suggestion. As in main.py
+    the statistics are computed on their own engine while the next turns
+    run; "stats" is the time the turn spends on them, and the wait for the
+    worker to finish after the last turn is shown separately.
+
+    Not timed: ponder and speculation (their hits), the opening book, the
+    tablebases, the explorer and its prior, the game clock and the journal.
+    """
+    settings = argparse.Namespace(**MODE_PRESETS[mode])
+    stop_rule = StopRule(settings.stable_depths, settings.stable_swing, settings.search_depth // 2)
+    limit = chess.engine.Limit(depth=settings.search_depth, time=settings.search_time)
+    random.seed(0)
+
+    core = EngineCore()
+    engine = core.open_engine(engine_command, {"Skill Level": settings.skill, "Threads": settings.threads,
+                                               "Hash": settings.hash, "UCI_ShowWDL": True})
+    stats_engine = core.open_engine(engine_command, {"Threads": 1, "Hash": 16, "UCI_ShowWDL": True})
+    calls = [0]
+    count_engine_calls(engine, calls)
+    count_engine_calls(stats_engine, calls)
+    worker = StatsWorker(stats_engine, StatsLedger())
+
+    print(f"\n🎯 Turn benchmark ({mode} mode, {plies} plies, {engine_command if isinstance(engine_command, str) else ' '.join(engine_command)})")
+    print(f"{'ply':>4} {'move':>7} " + " ".join(f"{stage:>9}" for stage in TURN_STAGES) + f" {'total ms':>9} {'calls':>6}")
+    board = chess.Board()
+    rows = []
+    drained = 0.0
+    try:
+        for ply in range(1, plies + 1):
+            if board.is_game_over():
+                break
+            times = {}
+            calls_before = calls[0]
+            # The helpers narrate for the interactive assistant; only the timings are shown here
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                if mode == "adaptive":
+                    adjust_adaptive_mode(board, engine, settings)
+                times["adaptive"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                turn = turn_search(board, engine, limit, core=core, stop_rule=stop_rule)
+                times["search"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                make_blunder(board, engine, blunder_chance=1.0, time_limit=blunder_time)
+                times["blunder"] = time.perf_counter() - start
+
+                san = board.san(turn.move)
+                board.push(turn.move)
+
+                start = time.perf_counter()
+                detect_tactics(board, board.turn)
+                times["tactics"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                worker.record(board)
+                times["stats"] = time.perf_counter() - start
+
+            rows.append((times, calls[0] - calls_before))
+            print(f"{ply:>4} {san:>7} " + " ".join(f"{times[stage] * 1000:>9.1f}" for stage in TURN_STAGES)
+                  + f" {sum(times.values()) * 1000:>9.1f} {calls[0] - calls_before:>6}")
+        start = time.perf_counter()
+        worker.drain()
+        drained = time.perf_counter() - start
+    finally:
+        core.close()
+
+    if not rows:
+        return
+    print(f"\n{'stage':>9} {'mean ms':>9} {'median':>9} {'max':>9}")
+    for stage in TURN_STAGES:
+        values = [times[stage] * 1000 for times, _ in rows]
+        print(f"{stage:>9} {statistics.mean(values):>9.1f} {statistics.median(values):>9.1f} {max(values):>9.1f}")
+    totals = [sum(times.values()) * 1000 for times, _ in rows]
+    print(f"\n⏱️  {statistics.mean(totals):.1f} ms per turn, {sum(count for _, count in rows)} engine calls "
+          f"({sum(count for _, count in rows) / len(rows):.2f} per turn)")
+    print(f"📊 Background statistics: {len(worker.ledger.plies)} moves, finished {drained * 1000:.0f} ms after the last turn")
+    print(eval_cache.summary())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for StockChessPy hot paths")
+    parser.add_argument("bench", choices=["complexity", "tactics", "turns"], help="Benchmark to run")
+    parser.add_argument("--engine", default=engine_path, help="Path to the Stockfish binary")
+    parser.add_argument("--fake", action="store_true", help="Use the deterministic fake_uci.py engine instead of Stockfish")
+    parser.add_argument("--fake-delay", type=float, default=0.01, help="Seconds per depth of the fake engine (0 measures Python overhead)")
+    parser.add_argument("--mode", choices=list(MODE_PRESETS), default="aggressive", help="Preset used by the turn benchmark")
+    parser.add_argument("--plies", type=int, default=20, help="Turns played by the turn benchmark")
+    parser.add_argument("--time", type=float, default=1.0, help="Time budget in seconds for the fast path (turns: blunder ranking)")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions per position for micro-benchmarks")
+    parser.add_argument("--fen", action="append", help="Benchmark this FEN instead of the built-in set (repeatable)")
+    args = parser.parse_args()
+
+    if args.bench == "tactics":
+        # Pure Python, no engine needed
+        bench_tactics(args.fen or BENCH_FENS, args.repeat)
+        raise SystemExit(0)
+
+    engine_command = args.engine
+    if args.fake:
+        fake_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_uci.py")
+        engine_command = [sys.executable, fake_path, "--delay", str(args.fake_delay)]
+
+    if args.bench == "turns":
+        bench_turns(engine_command, args.mode, args.plies, args.time)
+        raise SystemExit(0)
+
+    engine = chess.engine.SimpleEngine.popen_uci(engine_command)
+    engine.configure({"UCI_ShowWDL": True})
+    try:
+        if args.bench == "complexity":
+            bench_complexity(engine, args.fen or BENCH_FENS + QUIET_FENS, args.time)
+    finally:
+        engine.quit()
@@ -1,9 +1,19 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import as_completed
 import cloudscraper
+from requests import RequestException
 import chess
 import chess.engine
+from engine_core import EngineCore
 
 USERNAME = ""  # Your Chess.com username
 ENGINE_PATH = "/data/data/com.termux/files/usr/bin/stockfish"
+API_URL = "https://api.chess.com/pub/player/{username}/games"
+CACHE_PATH = "games/check_cache.json"
 
 # ANSI color codes
 RED = "\033[91m"
@@ -12,56 +22,239 @@ CYAN = "\033[96m"
 BOLD = "\033[1m"
 RESET = "\033[0m"
 
-def get_games(username):
-    scraper = cloudscraper.create_scraper()
-    url = f"https://api.chess.com/pub/player/{username}/games"
-    response = scraper.get(url)
-
-    if response.status_code != 200:
-        print(RED + "Failed to fetch games." + RESET)
-        return []
-
-    return response.json().get("games", [])
-
-def get_best_move(fen):
-    board = chess.Board(fen)
-    with chess.engine.SimpleEngine.popen_uci(ENGINE_PATH) as engine:
-        result = engine.play(board, chess.engine.Limit(time=2))
-    return board.san(result.move)
-
-# Fetch games
-# Fetch games
-games = get_games(USERNAME)
-if not games:
-    print(RED + "No ongoing games found." + RESET)
-    exit()
-
-moves_to_make = []  # Store all games where it's your turn
-
-for game in games:
-    is_black = game["black"].endswith(USERNAME)
-    turn = (game["turn"] == "black" and is_black) or (game["turn"] == "white" and not is_black)
-
-    if turn:
-        opponent_name = game["white"].split("/")[-1] if is_black else game["black"].split("/")[-1]
-        fen = game["fen"]
-        best_move = get_best_move(fen)
-        
-        moves_to_make.append((opponent_name, fen, best_move))
-
-# Display all moves instead of exiting early
-if moves_to_make:
+class GamesFeed:
+    """
+    The games feed behind one long-lived HTTP session.
+
+    Requests are conditional (If-None-Match / If-Modified-Since), so an
+    unchanged feed costs a 304 and no download. The last response and the
+    best move found for every game are kept in `cache_path`, and only games
+    whose FEN changed since then need the engine again.
+    """
+
+    def __init__(self, username, api_url=API_URL, cache_path=CACHE_PATH):
+        self.session = cloudscraper.create_scraper()
+        self.url = api_url.format(username=username)
+        self.cache_path = cache_path
+        self.cache = self.load_cache()
+        self.changed = False  # Whether the last fetch downloaded a new feed
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path) as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            cache = {}
+        if cache.get("url") != self.url:
+            cache = {"url": self.url, "etag": None, "last_modified": None, "games": [], "moves": {}}
+        return cache
+
+    def save_cache(self):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path + ".tmp", "w") as file:
+            json.dump(self.cache, file)
+        os.replace(self.cache_path + ".tmp", self.cache_path)
+
+    def fetch(self):
+        """
+        Fetch the games, or reuse the cached ones when the feed hasn't changed.
+
+        Returns:
+            list: the games (the cached ones if the fetch failed).
+        """
+        headers = {}
+        if self.cache["etag"]:
+            headers["If-None-Match"] = self.cache["etag"]
+        if self.cache["last_modified"]:
+            headers["If-Modified-Since"] = self.cache["last_modified"]
+        self.changed = False
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=30)
+        except RequestException as error:
+            print(RED + f"Failed to fetch games: {error}" + RESET)
+            return self.cache["games"]
+
+        if response.status_code == 304:
+            return self.cache["games"]
+        if response.status_code != 200:
+            print(RED + "Failed to fetch games." + RESET)
+            return self.cache["games"]
+
+        self.cache["etag"] = response.headers.get("ETag")
+        self.cache["last_modified"] = response.headers.get("Last-Modified")
+        self.cache["games"] = response.json().get("games", [])
+        self.changed = True
+        self.save_cache()
+        return self.cache["games"]
+
+    def known_move(self, game):
+        """Best move found on an earlier run, if the game's FEN hasn't changed since."""
+        entry = self.cache["moves"].get(game_key(game))
+        return entry["move"] if entry and entry["fen"] == game["fen"] else None
+
+    def remember(self, games, results):
+        """Store new best moves and forget games that left the feed."""
+        keys = {game_key(game) for game in games}
+        moves = {key: entry for key, entry in self.cache["moves"].items() if key in keys}
+        for key, fen, move in results:
+            moves[key] = {"fen": fen, "move": move}
+        self.cache["moves"] = moves
+        self.save_cache()
+
+def game_key(game):
+    return game.get("url") or f"{game['white']} {game['black']} {game.get('start_time', '')}"
+
+def opponent_of(game, username):
+    is_black = game["black"].endswith(username)
+    return game["white"].split("/")[-1] if is_black else game["black"].split("/")[-1]
+
+def is_my_turn(game, username):
+    is_black = game["black"].endswith(username)
+    return (game["turn"] == "black" and is_black) or (game["turn"] == "white" and not is_black)
+
+class WarmEngines:
+    """
+    Warm engines on one EngineCore, shared by concurrent searches.
+
+    Each search borrows an idle engine and gives it back when done, so N
+    engines analyse N games at once and keep their process and hash warm
+    for the next game.
+    """
+
+    def __init__(self, core, engine_path, size, options):
+        self.core = core
+        self.engines = [core.open_engine(engine_path, options) for _ in range(size)]
+        self.idle = core.run(self.make_queue())
+
+    async def make_queue(self):
+        idle = asyncio.Queue()
+        for engine in self.engines:
+            idle.put_nowait(engine)
+        return idle
+
+    async def best_move(self, board, limit):
+        engine = await self.idle.get()
+        try:
+            result = await engine.protocol.play(board, limit)
+        finally:
+            self.idle.put_nowait(engine)
+        return result.move
+
+    def submit(self, fen, limit):
+        """Search `fen` on the next idle engine. Returns a concurrent.futures.Future of the move."""
+        return self.core.spawn(self.best_move(chess.Board(fen), limit))
+
+def open_pool(core, engine_path, workers, threads, hash_size):
+    """Start `workers` warm engines, splitting the thread and hash budget across them."""
+    options = {"Threads": max(1, threads // workers), "Hash": max(16, hash_size // workers)}
+    print(f"{CYAN}Starting {workers} engines ({options['Threads']} threads, {options['Hash']} MB each){RESET}")
+    return WarmEngines(core, engine_path, workers, options)
+
+def analyse_games(pending, pool, time_limit, first_number=1):
+    """
+    Find the best move of every pending game on a pool of warm engines.
+
+    `pending` holds (key, opponent, fen) triples. Each result is printed as
+    soon as its search completes, numbered from `first_number`.
+
+    Returns:
+        list: (key, fen, best move in SAN), in completion order.
+    """
+    limit = chess.engine.Limit(time=time_limit)
+    results = []
+    start = time.perf_counter()
+    print(f"{CYAN}Analysing {len(pending)} games ({time_limit:g}s per game){RESET}")
+    futures = {pool.submit(fen, limit): (key, opponent, fen) for key, opponent, fen in pending}
+    for i, future in enumerate(as_completed(futures), first_number):
+        key, opponent_name, fen = futures[future]
+        try:
+            best_move = chess.Board(fen).san(future.result())
+        except (chess.engine.EngineError, chess.engine.EngineTerminatedError, ValueError) as error:
+            print(RED + f"Analysis failed for {opponent_name}: {error}" + RESET)
+            continue
+        results.append((key, fen, best_move))
+        show_move(i, opponent_name, fen, best_move)
+    print(f"\n{CYAN}Analysed {len(results)} games in {time.perf_counter() - start:.1f}s{RESET}")
+    return results
+
+def show_move(number, opponent_name, fen, best_move, cached=False):
+    print(f"\n{BOLD}{number}. Opponent: {CYAN}{opponent_name}{RESET}")
+    print(f"   FEN: {fen}")
+    print(f"   {BOLD}Best Move: {GREEN}{best_move}{RESET}" + (" (unchanged since last run)" if cached else ""))
+
+def check_games(feed, games, username, pool, time_limit, reanalyse=False):
+    """Show the best move of every game where it's your turn, running the engine only on changed positions."""
+    mine = [game for game in games if is_my_turn(game, username)]
+    if not mine:
+        print(CYAN + "\nNo games where it's your turn found. Here are all ongoing games:" + RESET)
+        for i, game in enumerate(games, 1):
+            turn = is_my_turn(game, username)
+            print(f"{BOLD}{i}. {CYAN}{opponent_of(game, username)}{RESET} (Your turn: {GREEN if turn else RED}{turn}{RESET})")
+
+        print("\n" + RED + "No moves to make. Wait for your opponent." + RESET)
+        feed.remember(games, [])
+        return
+
     print(f"\n{BOLD}{CYAN}Your Moves:{RESET}")
-    for i, (opponent_name, fen, best_move) in enumerate(moves_to_make, 1):
-        print(f"{BOLD}{i}. Opponent: {CYAN}{opponent_name}{RESET}")
-        print(f"   FEN: {fen}")
-        print(f"   {BOLD}Best Move: {GREEN}{best_move}{RESET}\n")
-else:
-    print(CYAN + "\nNo games where it's your turn found. Here are all ongoing games:" + RESET)
-    for i, game in enumerate(games, 1):
-        is_black = game["black"].endswith(USERNAME)
-        opponent_name = game["white"].split("/")[-1] if is_black else game["black"].split("/")[-1]
-        turn = (game["turn"] == "black" and is_black) or (game["turn"] == "white" and not is_black)
-        print(f"{BOLD}{i}. {CYAN}{opponent_name}{RESET} (Your turn: {GREEN if turn else RED}{turn}{RESET})")
-
-    print("\n" + RED + "No moves to make. Wait for your opponent." + RESET)
+    pending = []
+    for i, game in enumerate(mine, 1):
+        known = None if reanalyse else feed.known_move(game)
+        if known:
+            show_move(i, opponent_of(game, username), game["fen"], known, cached=True)
+        else:
+            pending.append((game_key(game), opponent_of(game, username), game["fen"]))
+
+    results = analyse_games(pending, pool(len(pending)), time_limit, len(mine) - len(pending) + 1) if pending else []
+    feed.remember(games, results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Best moves for every Chess.com daily game where it's your turn")
+    parser.add_argument("-u", "--username", default=USERNAME, help="Your Chess.com username")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Engines analysing games at the same time")
+    parser.add_argument("-t", "--threads", type=int, default=os.cpu_count() or 1, help="Total CPU threads, split across the engines")
+    parser.add_argument("-m", "--hash", type=int, default=256, help="Total hash (MB), split across the engines")
+    parser.add_argument("--time", type=float, default=2.0, help="Seconds of search per game")
+    parser.add_argument("--engine", default=ENGINE_PATH, help="Path to the Stockfish binary")
+    parser.add_argument("--api-url", default=API_URL, help="Games API URL; {username} is filled in (e.g. a local stand-in for testing)")
+    parser.add_argument("--cache", default=CACHE_PATH, help="File keeping the last feed and best moves between runs")
+    parser.add_argument("--reanalyse", action="store_true", help="Analyse every game again, even if its position hasn't changed")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="Keep polling the feed every SECONDS, with the engines kept warm")
+    args = parser.parse_args()
+
+    feed = GamesFeed(args.username, args.api_url, args.cache)
+    core = EngineCore()
+    engines = []
+
+    def pool(needed):
+        # Engines start on the first position that needs them and stay warm between polls
+        if not engines:
+            size = args.workers if args.watch else min(args.workers, needed)
+            engines.append(open_pool(core, args.engine, max(1, size), args.threads, args.hash))
+        return engines[0]
+
+    try:
+        first = True
+        while True:
+            # Fetch games
+            games = feed.fetch()
+            if not first and not feed.changed:
+                print(f"{CYAN}No changes in the games feed.{RESET}")
+            elif not games:
+                print(RED + "No ongoing games found." + RESET)
+            else:
+                check_games(feed, games, args.username, pool, args.time, args.reanalyse)
+
+            if not args.watch:
+                break
+            first = args.reanalyse = False
+            print(f"\n{CYAN}Checking again in {args.watch:g}s (Ctrl-C to stop)...{RESET}")
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        core.close()
+
+if __name__ == "__main__":
+    main()
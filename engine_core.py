@@ -0,0 +1,221 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+import chess
+import chess.engine
+
+# Stop a search once the best move has held for `stable_depths` consecutive
+# depths with the score moving at most `max_swing` centipawns, from `min_depth` on
+# (callers pass half the limit's depth ceiling, so the rule has room below it)
+StopRule = namedtuple("StopRule", ["stable_depths", "max_swing", "min_depth"], defaults=(5,))
+
+class SearchInterrupted(Exception):
+    """A search was cancelled because its `interrupt` check fired (e.g. the user typed a move)."""
+
+class Search:
+    """
+    A best-move search running on the core's event loop.
+
+    It can be cancelled at any moment: the engine is told to stop at once
+    instead of finishing its time or depth limit. With a StopRule the info
+    lines are watched as they stream in and the search ends as soon as the
+    best move is stable; the limit is then only a hard cap. A `deadline`
+    (seconds) stops the search even when the limit itself has no time, e.g.
+    a game clock the engine manages on its own.
+
+    When the stop rule ends a search, `projected` is how long the limit
+    itself would have searched: the time per depth so far, extrapolated to
+    the limit's depth and capped at its time (or the deadline).
+    """
+
+    def __init__(self, core, engine, board, limit, info=chess.engine.INFO_ALL, stop_rule=None, deadline=None):
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.stable_depth = None  # Depth at which the stop rule ended the search, if it did
+        self.stopped_at = None  # Engine time (seconds) when it did
+        self.projected = None
+        self.future = core.spawn(self._run(engine.protocol, board.copy(), limit, info, stop_rule, deadline))
+
+    async def _run(self, protocol, board, limit, info, stop_rule, deadline):
+        analysis = await protocol.analysis(board, limit, info=info)
+        timer = asyncio.get_running_loop().call_later(deadline, analysis.stop) if deadline else None
+        try:
+            if stop_rule is not None:
+                await self._watch(analysis, stop_rule, limit, deadline)
+            best = await analysis.wait()
+            return best.move, analysis.info
+        finally:
+            if timer:
+                timer.cancel()
+            analysis.stop()  # No-op once finished, stops the engine when cancelled
+            self.elapsed = time.perf_counter() - self.started
+
+    async def _watch(self, analysis, rule, limit, deadline):
+        lines = []  # (depth, best move, score, seconds) of the last complete line at each depth
+        async for info in analysis:
+            if info.get("multipv", 1) != 1 or not info.get("pv") or "score" not in info:
+                continue
+            if info.get("lowerbound") or info.get("upperbound"):
+                continue  # Aspiration window fail, not a finished line
+            depth = info.get("depth", 0)
+            seconds = info.get("time", time.perf_counter() - self.started)
+            line = (depth, info["pv"][0], info["score"].relative.score(mate_score=100000), seconds)
+            if lines and lines[-1][0] == depth:
+                lines[-1] = line
+            else:
+                lines.append(line)
+
+            recent = lines[-rule.stable_depths:]
+            scores = [score for _, _, score, _ in recent]
+            if (depth >= rule.min_depth and len(recent) == rule.stable_depths
+                    and all(move == line[1] for _, move, _, _ in recent)
+                    and max(scores) - min(scores) <= rule.max_swing):
+                self.stable_depth = depth
+                self.stopped_at = seconds
+                self.projected = self.project([(depth, seconds) for depth, _, _, seconds in lines], limit, deadline)
+                analysis.stop()
+                return
+
+    @staticmethod
+    def project(times, limit, deadline=None):
+        """
+        Seconds `limit` would have searched, from the (depth, seconds) of the depths reached so far.
+
+        The time of the last depth grows by the recent time ratio between
+        depths until the limit's depth, and is capped at its time or the deadline.
+        """
+        caps = [cap for cap in (limit.time, deadline) if cap]
+        cap = min(caps) if caps else None
+        if limit.depth is None:
+            return cap
+        depth, seconds = times[-1]
+        recent = times[-4:]
+        ratios = [later / earlier for (_, earlier), (_, later) in zip(recent, recent[1:]) if earlier > 0]
+        growth = max(1.0, math.prod(ratios) ** (1 / len(ratios))) if ratios else 2.0
+        estimate = seconds * growth ** max(0, limit.depth - depth)
+        return min(estimate, cap) if cap else estimate
+
+    def result(self):
+        """Wait for (move, info). Raises concurrent.futures.CancelledError if cancelled."""
+        return self.future.result()
+
+    def wait(self, interrupt, poll=0.05):
+        """
+        Wait for (move, info), checking `interrupt()` every `poll` seconds.
+
+        Raises SearchInterrupted, with the engine stopped, as soon as it returns true.
+        """
+        while True:
+            try:
+                return self.future.result(timeout=poll)
+            except concurrent.futures.TimeoutError:
+                if interrupt():
+                    self.cancel()
+                    raise SearchInterrupted() from None
+
+    def cancel(self):
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+class EngineCore:
+    """
+    asyncio session core built on chess.engine.popen_uci.
+
+    One event loop, running in a background thread, owns every engine
+    process (UciProtocol) of the session. Blocking code talks to the
+    engines through SimpleEngine wrappers bound to that loop, so all the
+    existing helpers keep working. Searches, background jobs and file I/O
+    run as tasks on the loop and overlap the interactive prompt in the
+    main thread.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="EngineCore", daemon=True)
+        self.thread.start()
+        self.engines = []
+        self.jobs = set()
+
+    def run(self, coro):
+        """Run a coroutine on the core's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def spawn(self, coro):
+        """Run a coroutine in the background. Returns a concurrent.futures.Future."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        self.jobs.add(future)
+        future.add_done_callback(self.jobs.discard)
+        return future
+
+    def to_thread(self, function, *args):
+        """Run blocking work (file I/O) in the background, off the interactive loop."""
+        return self.spawn(asyncio.to_thread(function, *args))
+
+    def open_engine(self, engine_path, options=None, nice=0):
+        """
+        Start a UCI engine on the core's loop.
+
+        A positive `nice` lowers the engine process's CPU priority, for
+        background work that must not slow down the main engine. Engines run
+        in their own process group, so a Ctrl-C in the terminal only reaches
+        the assistant, which still needs them to shut down cleanly.
+
+        Returns:
+            chess.engine.SimpleEngine: synchronous wrapper bound to the core's loop
+            (its .protocol is the underlying UciProtocol for async use).
+        """
+        async def start():
+            transport, protocol = await chess.engine.popen_uci(engine_path, setpgrp=True)
+            engine = chess.engine.SimpleEngine(transport, protocol)
+            if nice and hasattr(os, "setpriority"):
+                os.setpriority(os.PRIO_PROCESS, transport.get_pid(), nice)
+            if options:
+                await protocol.configure(options)
+            return engine
+
+        engine = self.run(start())
+        self.engines.append(engine)
+        return engine
+
+    def search(self, engine, board, limit, info=chess.engine.INFO_ALL, stop_rule=None, deadline=None):
+        """Start a cancellable best-move search on `engine` (ending early on a stable best move, with a StopRule)."""
+        return Search(self, engine, board, limit, info, stop_rule, deadline)
+
+    def drain(self):
+        """Wait for every background job to finish."""
+        for future in list(self.jobs):
+            try:
+                future.result()
+            except Exception as error:
+                print(f"⚠️ Background job failed: {error}")
+
+    def close(self):
+        """Finish background jobs, quit every engine and stop the loop (once; later calls do nothing)."""
+        if not self.thread.is_alive():
+            return
+        self.drain()
+        for engine in self.engines:
+            try:
+                engine.quit()
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError, asyncio.TimeoutError):
+                pass
+            engine.close()
+        self.engines = []
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+@contextlib.contextmanager
+def open_engine(engine_path, options=None):
+    """Thin synchronous wrapper for scripts: one engine on its own core, closed on exit."""
+    core = EngineCore()
+    try:
+        yield core.open_engine(engine_path, options)
+    finally:
+        core.close()
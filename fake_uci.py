@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# Deterministic stand-in UCI engine for benchmarks and for running the assistant
+# without Stockfish. Scores are material plus a fixed per-move jitter (from depth 2
+# on, minus what the opponent's best capture wins back), so the same position always
+# gets the same lines; only the per-depth delay costs wall time.
+import argparse
+import sys
+import threading
+import time
+import zlib
+import chess
+
+VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 320, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+OPTIONS = [
+    "option name Threads type spin default 1 min 1 max 1024",
+    "option name Hash type spin default 16 min 1 max 33554432",
+    "option name Clear Hash type button",
+    "option name Ponder type check default false",
+    "option name MultiPV type spin default 1 min 1 max 500",
+    "option name Skill Level type spin default 20 min 0 max 20",
+    "option name Move Overhead type spin default 10 min 0 max 5000",
+    "option name nodestime type spin default 0 min 0 max 10000",
+    "option name UCI_LimitStrength type check default false",
+    "option name UCI_Elo type spin default 1320 min 1320 max 3190",
+    "option name UCI_ShowWDL type check default false",
+    "option name SyzygyPath type string default <empty>",
+    "option name SyzygyProbeDepth type spin default 1 min 1 max 100",
+]
+
+def send(line):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+class FakeEngine:
+    def __init__(self, delay, max_depth, noise, bias):
+        self.delay = delay
+        self.max_depth = max_depth
+        self.noise = noise
+        self.bias = bias
+        self.board = chess.Board()
+        self.options = {"MultiPV": 1, "Skill Level": 20}
+        self.stop = threading.Event()
+        self.thread = None
+
+    def material(self, board):
+        """Material balance for the side to move."""
+        return sum(VALUES[piece.piece_type] * (1 if piece.color == board.turn else -1)
+                   for piece in board.piece_map().values())
+
+    def threat(self, board):
+        """What the side to move wins with its best capture, if we recapture when we can (a one-level exchange)."""
+        best = 0
+        for reply in board.generate_legal_captures():
+            gain = VALUES[chess.PAWN if board.is_en_passant(reply) else board.piece_type_at(reply.to_square)]
+            if board.is_attacked_by(not board.turn, reply.to_square):
+                gain -= VALUES[board.piece_type_at(reply.from_square)]
+            best = max(best, gain)
+        return best
+
+    def score(self, board, move, depth):
+        """Score of `move` for the side making it: material after it (and the best reply from depth 2) plus a fixed jitter."""
+        board.push(move)
+        if board.is_checkmate():
+            board.pop()
+            return None  # Mate in one
+        score = -self.material(board)
+        if depth >= 2:
+            score -= self.threat(board)
+        board.pop()
+        if self.noise:
+            seed = zlib.crc32(f"{board.fen()} {move.uci()} {depth // 3}".encode())
+            score += seed % (2 * self.noise + 1) - self.noise
+        return score + self.bias
+
+    def search(self, board, depth_limit, movetime, nodes_limit, infinite, searchmoves):
+        start = time.perf_counter()
+        moves = [move for move in board.legal_moves if not searchmoves or move in searchmoves]
+        if not moves:
+            send("info depth 0 score mate 0" if board.is_check() else "info depth 0 score cp 0")
+            send("bestmove (none)")
+            return
+
+        multipv = min(int(self.options["MultiPV"]), len(moves))
+        depth = 1
+        while True:
+            time.sleep(self.delay)
+            scored = sorted(((self.score(board, move, depth), move) for move in moves),
+                            key=lambda line: (line[0] is not None, -(line[0] or 0), line[1].uci()))
+            elapsed = time.perf_counter() - start
+            nodes = depth * 1000 * len(moves)
+            for rank, (score, move) in enumerate(scored[:multipv], 1):
+                board.push(move)
+                reply = next(iter(sorted(board.legal_moves, key=lambda m: m.uci())), None)
+                board.pop()
+                pv = f"{move.uci()} {reply.uci()}" if reply else move.uci()
+                if score is None:
+                    score_text, wins, losses = "mate 1", 1000, 0
+                else:
+                    score_text = f"cp {score}"
+                    wins = max(0, min(1000, 500 + score))
+                    losses = max(0, min(1000 - wins, 500 - score))
+                send(f"info depth {depth} seldepth {depth} multipv {rank} score {score_text} "
+                     f"wdl {wins} {1000 - wins - losses} {losses} nodes {nodes} "
+                     f"nps {int(nodes / max(elapsed, 1e-3))} time {int(elapsed * 1000)} pv {pv}")
+
+            if (self.stop.is_set() or (depth_limit and depth >= depth_limit)
+                    or (movetime and elapsed >= movetime) or (nodes_limit and nodes >= nodes_limit)
+                    or (not infinite and depth >= self.max_depth)):
+                break
+            depth += 1
+
+        if infinite:
+            self.stop.wait()
+        # Lower skill levels play a deterministically worse line
+        weaker = (20 - int(self.options["Skill Level"])) // 5
+        send(f"bestmove {scored[min(weaker, len(scored) - 1)][1].uci()}")
+
+    def go(self, tokens):
+        def value(name, default=0):
+            return int(tokens[tokens.index(name) + 1]) if name in tokens else default
+
+        movetime = value("movetime") / 1000
+        if "wtime" in tokens or "btime" in tokens:
+            remaining = value("wtime" if self.board.turn == chess.WHITE else "btime")
+            increment = value("winc" if self.board.turn == chess.WHITE else "binc")
+            movetime = (remaining / 30 + increment) / 1000
+        searchmoves = []
+        if "searchmoves" in tokens:
+            searchmoves = [chess.Move.from_uci(token) for token in tokens[tokens.index("searchmoves") + 1:]
+                           if 4 <= len(token) <= 5]
+        infinite = "infinite" in tokens or "ponder" in tokens
+
+        self.stop.clear()
+        self.thread = threading.Thread(target=self.search, args=(self.board.copy(), value("depth"), movetime,
+                                                                 value("nodes"), infinite, searchmoves))
+        self.thread.start()
+
+    def position(self, tokens):
+        if tokens[1] == "startpos":
+            self.board = chess.Board()
+        else:
+            end = tokens.index("moves") if "moves" in tokens else len(tokens)
+            self.board = chess.Board(" ".join(tokens[2:end]))
+        if "moves" in tokens:
+            for move in tokens[tokens.index("moves") + 1:]:
+                self.board.push_uci(move)
+
+    def setoption(self, line):
+        name, _, value = line[len("setoption name "):].partition(" value ")
+        self.options[name.strip()] = value.strip()
+
+    def run(self):
+        for line in sys.stdin:
+            tokens = line.split()
+            if not tokens:
+                continue
+            command = tokens[0]
+            if command == "uci":
+                send("id name FakeUCI")
+                send("id author StockChessPy")
+                for option in OPTIONS:
+                    send(option)
+                send("uciok")
+            elif command == "isready":
+                send("readyok")
+            elif command == "setoption":
+                self.setoption(line.strip())
+            elif command == "position":
+                self.position(tokens)
+            elif command == "go":
+                self.go(tokens)
+            elif command in ("stop", "quit"):
+                self.stop.set()
+                if self.thread:
+                    self.thread.join()
+                if command == "quit":
+                    break
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic stand-in UCI engine")
+    parser.add_argument("--delay", type=float, default=0.01, help="Seconds per search depth")
+    parser.add_argument("--max-depth", type=int, default=20, help="Depth a search without limits stops at")
+    parser.add_argument("--noise", type=int, default=10, help="Fixed per-move score jitter (centipawns, +-)")
+    parser.add_argument("--bias", type=int, default=0, help="Centipawns added to every score")
+    args = parser.parse_args()
+    FakeEngine(args.delay, args.max_depth, args.noise, args.bias).run()
@@ -1,17 +1,16 @@
 import os,sys
 import random
 import argparse
+import atexit
+import select
 import chess
 import chess.engine
 import readline 
 from util import *
+from engine_core import EngineCore, SearchInterrupted, StopRule, open_engine
 
 engine_path = "/data/data/com.termux/files/usr/bin/stockfish"
 
-if not os.path.exists(engine_path):
-    print("❌ Stockfish engine not found. Install it. Refer https://github.com/Kamanati/StockChessPy")
-    exit(1)
-
 import argparse
 
 parser = argparse.ArgumentParser(description="Stockfish Chess Engine with Custom Modes")
@@ -29,99 +28,95 @@ modes_group.add_argument("-N", "--newbie", action="store_true", help="Play like
 custom_group = parser.add_argument_group("Custom", "Fine-tune engine settings")
 custom_group.add_argument("-s", "--skill", type=int, default=20, help="Stockfish skill level (0-20)")
 custom_group.add_argument("-e", "--elo", type=int, default=3190, help="Stockfish UCI Elo rating (1390 - 3190)")
-custom_group.add_argument("-t", "--threads", type=int, default=3, help="Number of CPU threads for Stockfish (Higher = Faster)")
-custom_group.add_argument("-m", "--hash", type=int, default=512, help="Hash table size (MB) (Higher = Lower chance of crash)")
+custom_group.add_argument("-t", "--threads", type=int, help="Number of CPU threads for Stockfish (Higher = Faster, default 3 or from --autotune)")
+custom_group.add_argument("-m", "--hash", type=int, help="Hash table size (MB) (Higher = Lower chance of crash, default 512 or from --autotune)")
 custom_group.add_argument("-o", "--move-overhead", type=int, default=30, help="Move overhead in milliseconds (Higher = More time for move)")
 custom_group.add_argument("-n", "--nodestime", type=int, default=10000, help="Minimum nodes per move (Higher = Best move)")
 custom_group.add_argument("-z", "--syzygy-depth", type=int, default=10, help="Syzygy tablebase probe depth (Endgame table)")
+custom_group.add_argument("-Z", "--syzygy-path", help="Directory of local Syzygy tablebases, probed directly before searching")
+custom_group.add_argument("--stable-depths", type=int, default=4, help="Stop a suggestion search once the best move held this many depths (0 = always use the full time)")
+custom_group.add_argument("--stable-swing", type=int, default=20, help="Largest score swing (centipawns) over those depths that still counts as stable")
+custom_group.add_argument("--search-time", type=float, default=3.0, help="Hard time cap in seconds for each suggestion search")
+custom_group.add_argument("--search-depth", type=int, default=10, help="Depth ceiling for each suggestion search, whichever of depth and time comes first")
 
 other_group = parser.add_argument_group("Others", "Others options")
 other_group.add_argument("-B", "--blunder", type=float, default=0.1, help="Blunder chance percentage (0.0 - 1.0)")
+other_group.add_argument("-b", "--blunder-time", type=float, default=1.0, help="Total time in seconds to rank moves when blundering")
+other_group.add_argument("-P", "--ponder", action="store_true", help="Think on the opponent's expected reply while waiting for their move")
+other_group.add_argument("-S", "--speculate", type=int, default=0, help="Precompute replies to the opponent's K likeliest moves on K extra engines")
+other_group.add_argument("--pool-threads", type=int, help="Threads per speculation engine (default: threads split across the pool)")
+other_group.add_argument("--pool-hash", type=int, help="Hash (MB) per speculation engine (default: hash split across the pool)")
+other_group.add_argument("-E", "--eval-store", nargs="?", const="games/evals.db", help="Keep evaluations in a local file across sessions (default file: games/evals.db)")
+other_group.add_argument("--eval-store-size", type=int, default=200000, help="Maximum positions kept in the eval store")
+other_group.add_argument("--autotune", action="store_true", help=f"Benchmark Threads/Hash on this device, save the profile to {AUTOTUNE_PROFILE} and exit")
+other_group.add_argument("--eval-store-stats", action="store_true", help="Show eval store statistics and exit")
+other_group.add_argument("-k", "--book", nargs="?", const="", help="Answer opening positions from a book built from games/ (plus a Polyglot .bin file if given)")
+other_group.add_argument("-x", "--explorer", action="store_true", help="Show what was played from each position in your saved games and how it scored")
+other_group.add_argument("--explorer-prior", type=int, metavar="CP", help="Prefer the best-scoring move from your saved games when the engine rates it at most CP centipawns worse (implies -x)")
+other_group.add_argument("--tc", help="Time control MINUTES+INCREMENT (e.g. 5+3): track both clocks and budget each suggestion")
+other_group.add_argument("--profile", nargs="?", const="games/profile.jsonl", help="Time every turn stage and engine call, print a breakdown per turn and append a JSON-lines trace (default file: games/profile.jsonl)")
+other_group.add_argument("--engine", default=engine_path, help="Path to the UCI engine (e.g. fake_uci.py to try things without Stockfish)")
 other_group.add_argument("-T", "--tatics",action="store_true", help="Display Tatics for each move")
 
 args = parser.parse_args()
 
+engine_path = args.engine
+if not os.path.exists(engine_path):
+    print("❌ Stockfish engine not found. Install it. Refer https://github.com/Kamanati/StockChessPy")
+    exit(1)
+
+if args.tc:
+    try:
+        GameClock.parse(args.tc)
+    except ValueError:
+        parser.error(f"--tc expects MINUTES+INCREMENT, e.g. 5+3 (got {args.tc!r})")
+
+if args.eval_store_stats:
+    store = EvalStore(args.eval_store or "games/evals.db", args.eval_store_size)
+    print(store.summary())
+    store.close()
+    sys.exit(0)
+
+if args.autotune:
+    with open_engine(engine_path) as tune_engine:
+        profile = autotune(tune_engine)
+    save_profile(profile)
+    print(f"✅ Profile saved to {AUTOTUNE_PROFILE}: Threads {profile['threads']}, Hash {profile['hash']} MB")
+    sys.exit(0)
+
+# Explicit -t/-m always win; otherwise presets and defaults scale to the autotune profile
+explicit_threads, explicit_hash = args.threads, args.hash
+args.threads = 3 if args.threads is None else args.threads
+args.hash = 512 if args.hash is None else args.hash
+
 slected_mode = None
+args.book_selection = "best"  # How book moves are picked: "best" or "weighted"
+
+for mode, settings in MODE_PRESETS.items():
+    if getattr(args, mode):
+        for key, value in settings.items():
+            setattr(args, key, value)
+        slected_mode = mode.capitalize()
+        break
 
-if args.aggressive:
-    args.skill = 20
-    args.elo = 3190
-    args.threads = 4
-    args.hash = 700
-    args.move_overhead = 10
-    args.nodestime = 10000
-    slected_mode = "Aggressive"
-
-elif args.newbie:
-    args.skill = 4
-    args.elo = 1320
-    args.threads = 2                                       
-    args.hash = 700
-    args.move_overhead = 800
-    args.nodestime = 700
-    slected_mode = "Newbie"
-
-elif args.intermediate:
-    args.skill = 15
-    args.elo = 2500
-    args.threads = 2
-    args.hash = 512
-    args.move_overhead = 25
-    args.nodestime = 8000
-    slected_mode = "Intermediate"
-
-elif args.club:
-    args.skill = 10
-    args.elo = 1800
-    args.threads = 2
-    args.hash = 256
-    args.move_overhead = 50
-    args.nodestime = 5000
-    slected_mode = "Club"
-
-elif args.classical:
-    args.skill = 20
-    args.elo = 3190
-    args.threads = 4
-    args.hash = 700
-    args.move_overhead = 50
-    args.nodestime = 10000
-    slected_mode = "Classical"
-
-elif args.defensive:
-    args.skill = 15
-    args.elo = 2400
-    args.threads = 2
-    args.hash = 512
-    args.move_overhead = 40
-    args.nodestime = 10000
-    slected_mode = "Defensive"
-
-elif args.gambit:
-    args.skill = 17
-    args.elo = 2700
-    args.threads = 3
-    args.hash = 256
-    args.move_overhead = 15
-    args.nodestime = 10000
-    slected_mode = "Gambit"
-
-elif args.adaptive:
-    args.skill = 18  # Start with a balanced level
-    args.elo = 2800
-    args.threads = 3
-    args.hash = 768
-    args.move_overhead = 20
-    args.nodestime = 10000
-    slected_mode = "Adaptive"
+profile = load_profile()
+if profile:
+    args.threads, args.hash = scale_to_profile(args.threads, args.hash, profile)
+if explicit_threads is not None:
+    args.threads = explicit_threads
+if explicit_hash is not None:
+    args.hash = explicit_hash
 
 # Initialize board and Stockfish engine
 board = chess.Board()
-engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+# Every engine of the session runs on one asyncio core
+core = EngineCore()
+atexit.register(core.close)  # Engines are quit on every way out, even before the game starts
+engine = core.open_engine(engine_path)
 
 
 # Configure Stockfish based on arguments
-engine.configure({
+engine_options = {
     "Skill Level": args.skill,
     "UCI_Elo": args.elo,
     "UCI_LimitStrength": False,
@@ -131,7 +126,45 @@ engine.configure({
     "nodestime": args.nodestime,
     "SyzygyProbeDepth": args.syzygy_depth,
     "UCI_ShowWDL": True
-})
+}
+if args.syzygy_path:
+    engine_options["SyzygyPath"] = args.syzygy_path
+    tablebase.open(args.syzygy_path)
+engine.configure(engine_options)
+
+book = None
+if args.book is not None:
+    archive = book_archive if os.path.isdir(book_archive.directory) else None
+    book_files = archive.refresh() if archive is not None else 0  # Only new game files are parsed
+    book = OpeningBook(args.book or None, archive)
+
+explorer = None
+if args.explorer or args.explorer_prior is not None:
+    explorer_files = opening_explorer.refresh()  # Only new game files are parsed
+    explorer = opening_explorer
+
+if args.eval_store:
+    eval_cache.store = EvalStore(args.eval_store, args.eval_store_size)
+
+# Game statistics are evaluated on a second, low-priority engine in the background
+stats_engine = core.open_engine(engine_path, {"Threads": 1, "Hash": 16, "UCI_ShowWDL": True}, nice=10)
+
+# Extra engines for speculative replies, sharing the thread and hash budget
+speculator = None
+if args.speculate > 0:
+    pool = EnginePool(engine_path, args.speculate, {
+        **engine_options,
+        "Threads": args.pool_threads or max(1, args.threads // args.speculate),
+        "Hash": args.pool_hash or max(16, args.hash // args.speculate),
+    }, core)
+    speculator = Speculator(pool)
+
+if args.profile:
+    profiler.start(args.profile)
+    profiler.instrument(engine, "main")
+    profiler.instrument(stats_engine, "stats")
+    for number, pool_engine in enumerate(pool.engines if speculator else [], 1):
+        profiler.instrument(pool_engine, f"pool{number}")
 
 # Display Configurations in an Attractive Way
 print("\n🔧 Stockfish Configuration 🔧")
@@ -143,11 +176,30 @@ else:
       print(f"🎮 Mode        : Custom ")
 print(f"🧠 Skill Level     : {args.skill}")
 print(f"🎖️  Elo Rating     : {args.elo}")
-print(f"🖥️  CPU Threads    : {args.threads}")
-print(f"💾 Hash Size       : {args.hash} MB")
+tuned = " (autotuned)" if profile else ""
+print(f"🖥️  CPU Threads    : {args.threads}{tuned if explicit_threads is None else ''}")
+print(f"💾 Hash Size       : {args.hash} MB{tuned if explicit_hash is None else ''}")
 print(f"⏳ Move Overhead   : {args.move_overhead} ms")
 print(f"🔍 Nodes per Move  : {args.nodestime}")
-print(f"📚 Syzygy Depth    : {args.syzygy_depth}\n")
+print(f"📚 Syzygy Depth    : {args.syzygy_depth}")
+if args.stable_depths > 0:
+    print(f"⏱️  Search Time     : up to {args.search_time:g}s or depth {args.search_depth}, stops when stable for {args.stable_depths} depths (±{args.stable_swing} cp) from depth {args.search_depth // 2}")
+else:
+    print(f"⏱️  Search Time     : up to {args.search_time:g}s or depth {args.search_depth}")
+if args.tc:
+    print(f"⏰ Time Control    : {args.tc} (clock-managed, search time is ignored)")
+if args.syzygy_path:
+    print(f"📚 Syzygy Path     : {args.syzygy_path}")
+if book:
+    print(f"📖 Opening Book    : {len(book)} archive positions ({book_files} new game files){', ' + args.book if args.book else ''} ({args.book_selection})")
+if explorer:
+    prior = f", prior within {args.explorer_prior} cp" if args.explorer_prior is not None else ""
+    print(f"📒 Explorer        : {len(explorer)} positions ({explorer_files} new game files{prior})")
+if eval_cache.store:
+    print(f"🗄️  Eval Store      : {args.eval_store}")
+if speculator:
+    print(f"🧠 Speculation     : {args.speculate} engines")
+print()
 
 if len(sys.argv) == 1:
      print("StockChessPy starts as Aggresive for costomize use `python main.py -h`\n")
@@ -167,27 +219,136 @@ def completer(text, state):
 readline.parse_and_bind("tab: complete")
 readline.set_completer(completer)
 
-# Ask for opponent's color
-while True:
-    opponent_color = input("Is your opponent playing as White or Black? (w/b): ").strip().lower()
-    if opponent_color in ['w', 'b']:
-        break
-    print("Invalid choice. Enter 'w' for White or 'b' for Black.")
-
-# If opponent is Black, suggest the best opening move
-if opponent_color == 'b':
-    best_move = engine.play(board, chess.engine.Limit(depth=20,time=2))
-    best_move_algebraic = board.san(best_move.move)
-    print(f"\n🔥 Suggested first move: {best_move_algebraic} 🔥")
-    board.push(best_move.move)
+# Every move goes to a journal, so a session killed mid-game can pick up where it stopped
+journal = GameJournal()
+resumed = journal.replay()
+if resumed:
+    started, plies = time.strftime("%d %b %H:%M", time.localtime(resumed[3])), len(resumed[0].move_stack)
+    if input(f"🔁 Resume the unfinished game from {started} ({plies} plies)? (y/n): ").strip().lower() != 'y':
+        resumed = None
+
+if resumed:
+    board, opponent_color = resumed[0], resumed[1]
+    print(f"✅ Resumed: opponent plays {'White' if opponent_color == 'w' else 'Black'}, "
+          f"{'White' if board.turn == chess.WHITE else 'Black'} to move")
+    print_board(board)
+else:
+    # Ask for opponent's color
+    while True:
+        opponent_color = input("Is your opponent playing as White or Black? (w/b): ").strip().lower()
+        if opponent_color in ['w', 'b']:
+            break
+        print("Invalid choice. Enter 'w' for White or 'b' for Black.")
+
+# Suggestion searches stop on a stable best move, with the depth and time limits as hard caps
+stop_rule = StopRule(args.stable_depths, args.stable_swing, args.search_depth // 2) if args.stable_depths > 0 else None
+turn_limit = chess.engine.Limit(depth=args.search_depth, time=args.search_time)
+opening_limit = chess.engine.Limit(depth=20, time=2)
+ponder = Ponder(core)
+
+# Under a time control the engine sees both clocks and each suggestion gets a budget
+clock = None
+move_budget = None
+if args.tc:
+    clock = GameClock(*GameClock.parse(args.tc), chess.WHITE if opponent_color == 'b' else chess.BLACK)
+    clock.start()
+
+def suggestion_limit():
+    """Limit (and hard deadline) for the next suggestion: the clocks under a time control, else the fixed cap."""
+    global move_budget
+    if clock is None:
+        return turn_limit, None
+    move_budget = clock.budget(board)
+    return clock.limit(), move_budget
+
+def stop_clock():
+    """The assistant's move is on the board: charge its time and show budget against usage."""
+    if clock:
+        clock.record(move_budget, clock.press(clock.color))
+
+in_book = book is not None
+book_plies = 0
+
+# On a terminal, typing your move while a suggestion is searched cancels the search
+type_ahead = os.name == "posix" and sys.stdin.isatty()
+
+def typed_ahead():
+    """Whether a line was typed at the terminal while a suggestion is being searched."""
+    return bool(select.select([sys.stdin], [], [], 0)[0])
+
+def search_or_book(limit, deadline=None):
+    """Answer from the tablebases or the opening book when they cover the position, otherwise search."""
+    global in_book, book_plies
+    verdict = tablebase.verdict(board)
+    if verdict:
+        tablebase_turn = tablebase.turn(board)
+        if tablebase_turn is not None:
+            print(f"\n📚 Tablebase: {verdict}")
+            return tablebase_turn
+    if in_book:
+        move = book.choose(board, args.book_selection)
+        if move is not None:
+            book_plies += 1
+            print("\n📖 Book move")
+            return TurnResult(move=move, score=None, mate=None, wdl=None, pv=[move], depth=0)
+        in_book = False  # Out of book for the rest of the game
+    turn = turn_search(board, engine, limit, use_store=args.skill >= 20, core=core, stop_rule=stop_rule, deadline=deadline,
+                       interrupt=typed_ahead if type_ahead else None)
+    if explorer and args.explorer_prior is not None:
+        turn, known = explorer.prefer(board, engine, turn, args.explorer_prior, args.search_time / 2)
+        if known:
+            print(f"\n📒 Prior: {board.san(turn.move)} scored {explorer.score(known):.0%} in {known[1]} of your games "
+                  f"and is within {args.explorer_prior} cp of the engine's move")
+    return turn
+
+searched_with = (args.skill, args.nodestime)  # Adaptive settings the ponder and speculative searches ran with
+
+# If opponent is Black, suggest the best opening move (a resumed game may also stop on your move)
+if board.turn == (chess.WHITE if opponent_color == 'b' else chess.BLACK) and not board.is_game_over():
+    turn = search_or_book(*(suggestion_limit() if clock or resumed else (opening_limit, None)))
+    best_move_algebraic = board.san(turn.move)
+    print(f"\n🔥 Suggested {'next' if resumed else 'first'} move: {best_move_algebraic} 🔥")
+    board.push(turn.move)
+    stop_clock()
+    searched_with = (args.skill, args.nodestime)
+    if speculator and not in_book:
+        speculator.start(board, engine, turn_limit)
+    if args.ponder:
+        ponder.start(board, engine, turn, turn_limit)
 
 print("\nChess Assistant Started. Enter opponent's moves in algebraic notation (e.g., e4, Nc6)")
 
 stockfish_move = None  # Store Stockfish’s last move
 stockfish_move_uci = None  # Store UCI format for easy undo
 
-game_stats = initialize_game_stats()
-move_history = []
+ledger = resumed[2] if resumed else StatsLedger()  # Per-move statistics, saved with the game
+journal.start(board, opponent_color, ledger)
+stats_worker = StatsWorker(stats_engine, ledger, journal)
+move_history = list(board.move_stack) if resumed else []
+
+def shutdown():
+    """Close the session once, on every way out of the game: its end, quit or Ctrl-C."""
+    ponder.stop()
+    if speculator:
+        speculator.stop()
+    try:
+        stats_worker.drain()  # The last moves' statistics still go to the ledger, the journal and the store
+    except KeyboardInterrupt:
+        pass  # Ctrl-C again: a resumed game evaluates them later
+    with eval_cache.lock:  # The worker only touches the store under the lock, and sees it gone after this
+        store, eval_cache.store = eval_cache.store, None
+    if store:
+        store.close()
+    tablebase.close()
+    if book:
+        book.close()
+    profiler.close()
+    journal.close()
+    core.close()  # Waits for background jobs (the PGN), then quits every engine
+
+atexit.register(shutdown)
+if resumed and stats_worker.backfill(board):
+    print("📊 Evaluating the moves whose statistics were lost in the background")
 
 while not board.is_game_over():
 
@@ -195,7 +356,7 @@ while not board.is_game_over():
       move = input("Enter Opponent's Move: ")
 
     except KeyboardInterrupt:
-        print("\n🏳️‍ Game aborted.")
+        print("\n🏳️‍ Game aborted.")  # The journal is kept, so the game can be resumed
         sys.exit(0)
         break
 
@@ -208,18 +369,27 @@ while not board.is_game_over():
          parts = move.split(maxsplit=1)  # Splits into 'save' and 'filename'
          if len(parts) == 2 and parts[1].strip():  # Check if filename is provided
             filename = parts[1].strip()
-            save_game(board, filename)
+            stats_worker.drain()
+            core.to_thread(save_game, board.copy(), filename, ledger.copy())  # Written in the background
             continue
          else:
             print("❌️ Please provide a filename like this:\n> save filename")
             continue
-    elif move.lower() == "load":
-        board = load_game()
+    elif move.lower() == "load" or move.lower().startswith("load "):
+        ponder.stop()
+        stats_worker.drain()
+        loaded = load_game(ledger, move[len("load"):].strip())  # "load Opponent result:0-1" filters the list
+        if loaded is not None:
+            board = loaded
+            move_history = list(board.move_stack)
+            journal.start(board, opponent_color, ledger)
+        continue
     elif move.lower() == "oops":  # Fix accidental moves
         if stockfish_move is None:
             print("⚠️ No suggested move to verify yet.")
             continue
 
+        ponder.stop()
         print(f"🔄 You accidentally moved instead of {stockfish_move}. Let's fix it.")
         user_actual_move = input("Enter the move you actually played: ").strip()
 
@@ -227,25 +397,36 @@ while not board.is_game_over():
         board.pop()
 
         if move_history:
-           last_move = move_history.pop()  # Remove last move from history
-           remove_game_statistics(board, last_move, game_stats)  # Remove its stats
+           move_history.pop()  # Remove last move from history
+           stats_worker.undo(len(board.move_stack) + 1)  # Exactly the entry it added, no engine call
 
         try:
             # Apply the move the user actually played
             board.push_san(user_actual_move)
             move_history.append(board.peek())
-            update_game_statistics(engine, board, board.peek(), game_stats)
+            stats_worker.record(board)
             print(f"\n✅ Board updated: Your move {user_actual_move} is now applied.\n")
         except ValueError:
             print("❌ Invalid move entered. Keeping Stockfish's move.")
             board.push_uci(stockfish_move_uci)  # Restore Stockfish's move if the user input is invalid
+            move_history.append(board.peek())
+            stats_worker.record(board)
 
         continue  # Move on without re-suggesting
 
     try:
         board.push_san(move)
+        if clock:
+            clock.press(not clock.color)
+        profiler.begin_turn()
+        with profiler.stage("resolve"):
+            precomputed = ponder.resolve(board)  # Before any other engine use
+            speculated = speculator.resolve(board) if speculator else None
+        hit = "Ponder" if precomputed is not None else "Speculation" if speculated is not None else None
+        if precomputed is None:
+            precomputed = speculated
         move_history.append(board.peek())
-        update_game_statistics(engine, board, board.peek(), game_stats)
+        stats_worker.record(board)
 
     except ValueError:
         print("❌ Invalid move, try again.")
@@ -254,48 +435,129 @@ while not board.is_game_over():
     if board.is_game_over():
         break
 
+    if explorer:
+        history = explorer.describe(board)
+        if history:
+            print(f"📒 You played here: {history}")
+
     # Adaptive Mode Adjustments
     if args.adaptive:
-        adjust_adaptive_mode(board, engine, args)
-
-    analysis = engine.analyse(board, chess.engine.Limit(time=2), info=chess.engine.INFO_SCORE)
-    mate_in = analysis["score"].relative.mate()
+        with profiler.stage("adaptive"):
+            adjust_adaptive_mode(board, engine, args, speculator.pool if speculator else None)
+        if precomputed is not None and (args.skill, args.nodestime) != searched_with:
+            print(f"\n🔄 {hit} result dropped: it was searched with the previous adaptive settings.")
+            precomputed = None
+    if precomputed is not None:
+        print("\n⚡ Ponder hit: answered from the search made while you waited." if hit == "Ponder"
+              else "\n⚡ Speculation hit: answered from a precomputed reply.")
+
+    # One search per turn gives the mate alert, the blunder gate and the suggestion
+    limit, deadline = suggestion_limit()
+    if precomputed is not None:
+        turn = precomputed
+    else:
+        try:
+            with profiler.stage("search"):
+                turn = search_or_book(limit, deadline)
+        except (KeyboardInterrupt, SearchInterrupted) as stop:
+            # Ctrl-C or typing a move stops the engine at once; take the move the user chose instead
+            print("\n⏹️ Search cancelled.")
+            played = input().strip() if isinstance(stop, SearchInterrupted) else None  # The line typed during the search
+            while True:
+                try:
+                    board.push_san(played or input("Enter the move you played: ").strip())
+                    break
+                except ValueError:
+                    print("❌ Invalid move, try again.")
+                    played = None
+                except KeyboardInterrupt:
+                    print("\n🏳️‍ Game aborted.")
+                    sys.exit(0)
+            stop_clock()
+            move_history.append(board.peek())
+            stats_worker.record(board)
+            stockfish_move = None
+            profiler.end_turn(board.ply(), "cancelled")
+            continue
+    mate_in = turn.mate
     if mate_in is not None:
         print(f"\n⚠️ CHECKMATE IN {mate_in} MOVES! ⚠️")
 
     if args.blunder and mate_in is None and random.random() < args.blunder:
-       blunder_move = make_blunder(board, engine, blunder_chance=0.1)  # 10% chance to blunder
+       with profiler.stage("blunder"):
+          blunder_move = make_blunder(board, engine, blunder_chance=0.1, time_limit=args.blunder_time)  # 10% chance to blunder
        if blunder_move:
           stockfish_move = board.san(blunder_move)
           stockfish_move_uci = blunder_move.uci()
           board.push(blunder_move)
+          stop_clock()
+          move_history.append(board.peek())
+          stats_worker.record(board)  # Recorded like any suggestion, so oops can take it back
+          profiler.end_turn(board.ply(), stockfish_move)
           continue  # Skip the normal best move execution
 
-    best_move = engine.play(board, chess.engine.Limit(depth=10,time=3))
-    best_move_algebraic = board.san(best_move.move)
-    stockfish_move = board.san(best_move.move)  # Store Stockfish's move **before pushing**
-    stockfish_move_uci = best_move.move.uci()
-    board.push(best_move.move)
+    best_move_algebraic = board.san(turn.move)
+    stockfish_move = best_move_algebraic  # Store Stockfish's move **before pushing**
+    stockfish_move_uci = turn.move.uci()
+    board.push(turn.move)
 
-    move_history.append(board.peek())
-    update_game_statistics(engine, board, board.peek(), game_stats)
     if board.is_checkmate():
           print(f"\n💀 Checkmate: {best_move_algebraic}\n")
     else:
           print(f"\n✅ Best move for you: {best_move_algebraic}\n")
-    # Detect and display all tactics
-    tactics = detect_tactics(board, board.turn)
+    if explorer:
+        history = explorer.describe(board)
+        if history:
+            print(f"📒 Opponents answered here: {history}")
+    stop_clock()
+    move_history.append(board.peek())
+    stats_worker.record(board)
+    # Detect and display all tactics (only computed when asked for)
     if args.tatics:
+      with profiler.stage("tactics"):
+          tactics = detect_tactics(board, board.turn)
       for tactic, squares in tactics.items():
         if squares:
            print(f"⚔️ {tactic.replace('_', ' ').title()} detected at: {', '.join(squares)}")
 
+    with profiler.stage("ponder"):
+        searched_with = (args.skill, args.nodestime)
+        if speculator and not in_book and not board.is_game_over():
+            speculator.start(board, engine, turn_limit)
+        if args.ponder and not board.is_game_over():
+            ponder.start(board, engine, turn, turn_limit)
+    profiler.end_turn(board.ply(), best_move_algebraic)
+
+ponder.stop()
+if speculator:
+    speculator.stop()
+
+stats_worker.drain()  # Every played move is classified before the summary
 total_moves = len(move_history)
-summary = game_statistics_summary(board, game_stats, total_moves)
+summary = game_statistics_summary(board, ledger.stats, total_moves)
 print(summary)
-
-save_game_pgn(board, opponent_color)
+print(eval_cache.summary())
+if stop_rule:
+    print(early_stop.summary())
+if clock:
+    print(clock.summary())
+if args.ponder:
+    print(ponder.summary())
+if speculator:
+    print(speculator.summary())
+if eval_cache.store:
+    print(eval_cache.store.summary())
+if args.syzygy_path:
+    print(f"📚 Tablebase: {tablebase.answered} moves answered from tablebases")
+if book:
+    print(f"📖 Book: {book_plies} plies answered from the opening book")
+if args.profile:
+    print(profiler.summary())
+
+saved = core.to_thread(save_game_pgn, board, opponent_color, {"BookPlies": str(book_plies)} if book else None, ledger)
 
 # After the game ends
 #print("\n🏁 Game Over!")
-engine.quit()
+shutdown()  # Waits for the PGN to be written
+if saved.exception() is None:
+    journal.finish()  # The PGN now holds the whole game
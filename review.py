@@ -0,0 +1,202 @@
+import argparse
+import csv
+import os
+import sys
+import time
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import chess
+import chess.pgn
+import chess.engine
+from util import *
+
+engine_path = "/data/data/com.termux/files/usr/bin/stockfish"
+
+# One engine per worker process, started by init_worker()
+worker_engine = None
+
+def find_games(paths):
+    """
+    List every game in the given PGN files and directories.
+
+    Returns:
+        list: (path, byte offset, game number) for each game, in file order.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".pgn"))
+        else:
+            files.append(path)
+
+    games = []
+    for path in files:
+        with open(path) as pgn_file:
+            number = 0
+            while True:
+                offset = pgn_file.tell()
+                if chess.pgn.read_headers(pgn_file) is None:
+                    break
+                number += 1
+                games.append((path, offset, number))
+    return games
+
+def game_key(path, offset):
+    return f"{os.path.abspath(path)}:{offset}"
+
+def load_progress(progress_path):
+    """Keys of games already reviewed by an earlier (possibly interrupted) run."""
+    if not os.path.exists(progress_path):
+        return set()
+    with open(progress_path) as progress_file:
+        return {line.strip() for line in progress_file if line.strip()}
+
+def init_worker(engine_path, threads, hash_size, store_path):
+    global worker_engine
+    worker_engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    worker_engine.configure({"Threads": threads, "Hash": hash_size})
+    multiprocessing.util.Finalize(worker_engine, worker_engine.quit, exitpriority=10)
+    if store_path:
+        eval_cache.store = EvalStore(store_path)
+        multiprocessing.util.Finalize(eval_cache.store, eval_cache.store.close, exitpriority=10)
+
+def review_game(path, offset, time_limit):
+    """
+    Analyse every position of one game on this worker's engine.
+
+    Each position is evaluated once: the evaluation after move N is the one
+    before move N+1.
+    """
+    start = time.perf_counter()
+    with open(path) as pgn_file:
+        pgn_file.seek(offset)
+        game = chess.pgn.read_game(pgn_file)
+
+    board = game.board()
+    limit = chess.engine.Limit(time=time_limit)
+    stats = initialize_game_stats()
+    rows = []
+    eval_before = evaluate_position(worker_engine, board, limit)
+    for ply, move in enumerate(game.mainline_moves(), 1):
+        player = "White" if board.turn == chess.WHITE else "Black"
+        san = board.san(move)
+        board.push(move)
+        eval_after = evaluate_position(worker_engine, board, limit)
+        category = classify_move(eval_before, eval_after, player)
+        if category:
+            stats[player][category] += 1
+        rows.append((ply, player, san, move.uci(), eval_before, eval_after, category or ""))
+        eval_before = eval_after
+
+    return {
+        "white": game.headers.get("White", "?"),
+        "black": game.headers.get("Black", "?"),
+        "rows": rows,
+        "summary": game_statistics_summary(board, stats, len(rows)),
+        "positions": len(rows) + 1,
+        "elapsed": time.perf_counter() - start,
+    }
+
+def output_names(paths):
+    """
+    Output name for each PGN file: its base name, with as many parent directories
+    as it takes to tell apart files of the same name (a/games.pgn -> a_games).
+
+    Returns:
+        dict: path -> name, the same for the same inputs so a resumed run writes to the same files.
+    """
+    parts = {path: os.path.splitext(os.path.abspath(path))[0].split(os.sep)[1:] for path in set(paths)}
+    names = {}
+    for path, components in parts.items():
+        for size in range(1, len(components) + 1):
+            name = "_".join(components[-size:])
+            if not any(other != path and other_components[-size:] == components[-size:]
+                       for other, other_components in parts.items()):
+                break
+        names[path] = name
+    return names
+
+def write_review(out_dir, name, number, review):
+    """Write per-move evaluations (CSV) and the game summary (text) for one game."""
+    stem = f"{name}-{number}"
+    with open(os.path.join(out_dir, f"{stem}.csv"), "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["ply", "player", "san", "uci", "eval_before", "eval_after", "category"])
+        writer.writerows(review["rows"])
+    with open(os.path.join(out_dir, f"{stem}.txt"), "w") as summary_file:
+        summary_file.write(review["summary"])
+    return stem
+
+def main():
+    parser = argparse.ArgumentParser(description="Review saved games with a pool of Stockfish engines")
+    parser.add_argument("paths", nargs="*", default=["games"], help="PGN files or directories (default: games)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Number of engine worker processes")
+    parser.add_argument("-t", "--threads", type=int, default=1, help="Threads per engine")
+    parser.add_argument("-m", "--hash", type=int, default=64, help="Hash table size (MB) per engine")
+    parser.add_argument("--time", type=float, default=0.5, help="Seconds per position")
+    parser.add_argument("-O", "--out", default="games/review", help="Output directory")
+    parser.add_argument("--engine", default=engine_path, help="Path to the Stockfish binary")
+    parser.add_argument("-E", "--eval-store", help="Read and write evaluations in this eval store file (e.g. games/evals.db)")
+    parser.add_argument("--restart", action="store_true", help="Ignore earlier progress and review everything again")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.engine):
+        print("❌ Stockfish engine not found. Install it. Refer https://github.com/Kamanati/StockChessPy")
+        sys.exit(1)
+
+    os.makedirs(args.out, exist_ok=True)
+    progress_path = os.path.join(args.out, "progress.txt")
+    if args.restart and os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    games = find_games(args.paths)
+    names = output_names(path for path, _, _ in games)
+    done = load_progress(progress_path)
+    pending = [game for game in games if game_key(game[0], game[1]) not in done]
+    print(f"📂 {len(games)} games found, {len(games) - len(pending)} already reviewed, {len(pending)} to go")
+    if not pending:
+        return
+
+    print(f"🖥️  {args.workers} engines x {args.threads} threads, {args.hash} MB hash, {args.time}s per position\n")
+    start = time.perf_counter()
+    positions = 0
+    with open(progress_path, "a") as progress_file, \
+         ProcessPoolExecutor(args.workers, initializer=init_worker,
+                             initargs=(args.engine, args.threads, args.hash, args.eval_store)) as pool:
+        futures = {pool.submit(review_game, path, offset, args.time): (path, offset, number)
+                   for path, offset, number in pending}
+        try:
+            for future in as_completed(futures):
+                path, offset, number = futures[future]
+                try:
+                    review = future.result()
+                except Exception as error:
+                    print(f"❌ {path} game {number}: {error}")
+                    continue
+
+                stem = write_review(args.out, names[path], number, review)
+                # Record completion only once the output is on disk, so an interrupt can resume
+                progress_file.write(game_key(path, offset) + "\n")
+                progress_file.flush()
+                os.fsync(progress_file.fileno())
+
+                positions += review["positions"]
+                print(f"✅ {stem}: {review['white']} vs {review['black']} "
+                      f"({review['positions'] / review['elapsed']:.1f} positions/s)")
+                print(review["summary"])
+        except KeyboardInterrupt:
+            print("\n⏸️  Interrupted. Run again to resume where it stopped.")
+            for future in futures:
+                future.cancel()
+            raise SystemExit(130)
+
+    elapsed = time.perf_counter() - start
+    if args.eval_store:
+        store = EvalStore(args.eval_store)
+        print(store.summary())
+        store.close()
+    print(f"🏁 Reviewed {len(pending)} games, {positions} positions in {elapsed:.1f}s "
+          f"({positions / elapsed:.1f} positions/s with {args.workers} engines)")
+
+if __name__ == "__main__":
+    main()
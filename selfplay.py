@@ -0,0 +1,212 @@
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import time
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import chess
+import chess.pgn
+import chess.engine
+from util import *
+from engine_core import EngineCore, StopRule
+
+engine_path = "/data/data/com.termux/files/usr/bin/stockfish"
+
+# Short, balanced opening lines; each one is played twice with colours swapped
+OPENINGS = [
+    "e4 e5 Nf3 Nc6",
+    "e4 c5 Nf3 d6",
+    "e4 e6 d4 d5",
+    "e4 c6 d4 d5",
+    "d4 d5 c4 e6",
+    "d4 Nf6 c4 g6",
+    "d4 Nf6 c4 e6",
+    "c4 e5 Nc3 Nf6",
+    "Nf3 d5 g3 Nf6",
+    "e4 e5 Nf3 Nf6",
+    "d4 d5 c4 c6",
+    "e4 d5 exd5 Qxd5",
+]
+
+# One core and one engine per side in each worker process, started by init_worker()
+worker_core = None
+worker_engines = None
+
+def init_worker(engine_path, threads, hash_size):
+    global worker_core, worker_engines
+    worker_core = EngineCore()
+    options = {"Threads": threads, "Hash": hash_size, "UCI_ShowWDL": True}
+    worker_engines = [worker_core.open_engine(engine_path, options) for _ in range(2)]
+    multiprocessing.util.Finalize(worker_core, worker_core.close, exitpriority=10)
+
+def player_settings(mode, blunder, time_scale):
+    """A mode preset as a namespace like main.py's args, plus the blunder chance."""
+    player = argparse.Namespace(**MODE_PRESETS[mode], mode=mode, blunder=blunder)
+    player.search_time *= time_scale
+    return player
+
+def choose_move(board, engine, player, blunder_time):
+    """Pick `player`'s move the way main.py suggests one: adaptive adjustment, stable search, then the blunder gate."""
+    if player.mode == "adaptive":
+        adjust_adaptive_mode(board, engine, player)
+    stop_rule = StopRule(player.stable_depths, player.stable_swing, player.search_depth // 2) if player.stable_depths > 0 else None
+    limit = chess.engine.Limit(depth=player.search_depth, time=player.search_time)
+    turn = turn_search(board, engine, limit, core=worker_core, stop_rule=stop_rule)
+
+    if player.blunder and turn.mate is None and random.random() < player.blunder:
+        blunder_move = make_blunder(board, engine, blunder_chance=0.1, time_limit=blunder_time)
+        if blunder_move:
+            return blunder_move
+    return turn.move
+
+def play_game(number, modes, blunders, opening, seed, time_scale, blunder_time, max_plies):
+    """
+    Play one game between two presets on this worker's engines.
+
+    `modes` and `blunders` are (White, Black). Games still running after
+    `max_plies` are scored as draws.
+    """
+    start = time.perf_counter()
+    random.seed(f"{seed}-{number}")  # Forked workers would otherwise share one random sequence
+    board = chess.Board()
+    for san in opening.split():
+        board.push_san(san)
+
+    players = {}
+    engines = {chess.WHITE: worker_engines[0], chess.BLACK: worker_engines[1]}
+    for color, mode, blunder in zip((chess.WHITE, chess.BLACK), modes, blunders):
+        players[color] = player_settings(mode, blunder, time_scale)
+        engines[color].configure({
+            "Skill Level": players[color].skill,
+            "UCI_Elo": players[color].elo,
+            "UCI_LimitStrength": False,
+            "Move Overhead": players[color].move_overhead,
+            "nodestime": players[color].nodestime,
+        })
+
+    # The shared helpers narrate for the interactive assistant; keep the workers quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not board.is_game_over(claim_draw=True) and board.ply() < max_plies:
+            board.push(choose_move(board, engines[board.turn], players[board.turn], blunder_time))
+
+    result = board.result(claim_draw=True) if board.is_game_over(claim_draw=True) else "1/2-1/2"
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "StockChessPy self-play"
+    game.headers["Round"] = str(number)
+    game.headers["White"] = describe_player(modes[0], blunders[0])
+    game.headers["Black"] = describe_player(modes[1], blunders[1])
+    game.headers["Opening"] = opening
+    game.headers["Result"] = result
+    return {"pgn": str(game), "result": result, "plies": board.ply(), "elapsed": time.perf_counter() - start}
+
+def describe_player(mode, blunder):
+    return f"{mode} (blunder {blunder:g})" if blunder else mode
+
+def elo_difference(scores):
+    """
+    Elo difference implied by per-game scores (1, 0.5 or 0) with a 95% error bar.
+
+    Returns:
+        tuple: (estimate, low, high); infinite when every game was won or lost.
+    """
+    def elo(score):
+        if score <= 0:
+            return -math.inf
+        if score >= 1:
+            return math.inf
+        return -400 * math.log10(1 / score - 1) + 0.0  # No "-0" for an even score
+
+    mean = sum(scores) / len(scores)
+    if len(scores) < 2:
+        return elo(mean), -math.inf, math.inf
+    stdev = math.sqrt(sum((score - mean) ** 2 for score in scores) / (len(scores) - 1))
+    margin = 1.96 * stdev / math.sqrt(len(scores))
+    return elo(mean), elo(mean - margin), elo(mean + margin)
+
+def main():
+    parser = argparse.ArgumentParser(description="Play engine-vs-engine games between two mode presets")
+    parser.add_argument("mode_a", choices=list(MODE_PRESETS), help="First preset (the Elo difference is from its side)")
+    parser.add_argument("mode_b", choices=list(MODE_PRESETS), help="Second preset")
+    parser.add_argument("-g", "--games", type=int, default=24, help="Number of games (each opening is played with both colours)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (two engines each)")
+    parser.add_argument("-t", "--threads", type=int, default=1, help="Threads per engine")
+    parser.add_argument("-m", "--hash", type=int, default=64, help="Hash table size (MB) per engine")
+    parser.add_argument("--blunder-a", type=float, default=0.0, help="Blunder chance of the first preset, as -B in main.py")
+    parser.add_argument("--blunder-b", type=float, default=0.0, help="Blunder chance of the second preset, as -B in main.py")
+    parser.add_argument("-b", "--blunder-time", type=float, default=1.0, help="Seconds to rank moves when blundering")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiply every preset's search time (lower = faster, weaker games)")
+    parser.add_argument("--max-plies", type=int, default=300, help="Adjudicate a draw after this many plies")
+    parser.add_argument("--seed", type=int, help="Random seed for blunders (default: random)")
+    parser.add_argument("-O", "--out", default="games/selfplay", help="Output directory")
+    parser.add_argument("--engine", default=engine_path, help="Path to the Stockfish binary")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.engine):
+        print("❌ Stockfish engine not found. Install it. Refer https://github.com/Kamanati/StockChessPy")
+        sys.exit(1)
+
+    os.makedirs(args.out, exist_ok=True)
+    player_a = describe_player(args.mode_a, args.blunder_a)
+    player_b = describe_player(args.mode_b, args.blunder_b)
+    pgn_path = os.path.join(args.out, f"{args.mode_a}-vs-{args.mode_b}-{int(time.time())}.pgn")
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+
+    print(f"⚔️  {player_a} vs {player_b}: {args.games} games on {args.workers} workers "
+          f"({args.threads} threads, {args.hash} MB per engine, time x{args.time_scale:g})\n")
+    start = time.perf_counter()
+    scores = []  # From mode_a's side
+    wins = draws = losses = 0
+    with open(pgn_path, "w") as pgn_file, \
+         ProcessPoolExecutor(args.workers, initializer=init_worker,
+                             initargs=(args.engine, args.threads, args.hash)) as pool:
+        futures = {}
+        for number in range(1, args.games + 1):
+            a_white = number % 2 == 1
+            modes = (args.mode_a, args.mode_b) if a_white else (args.mode_b, args.mode_a)
+            blunders = (args.blunder_a, args.blunder_b) if a_white else (args.blunder_b, args.blunder_a)
+            opening = OPENINGS[(number - 1) // 2 % len(OPENINGS)]
+            future = pool.submit(play_game, number, modes, blunders, opening, seed,
+                                 args.time_scale, args.blunder_time, args.max_plies)
+            futures[future] = (number, a_white)
+        try:
+            for future in as_completed(futures):
+                number, a_white = futures[future]
+                try:
+                    game = future.result()
+                except Exception as error:
+                    print(f"❌ Game {number}: {error}")
+                    continue
+
+                pgn_file.write(game["pgn"] + "\n\n")
+                pgn_file.flush()
+                white_score = {"1-0": 1.0, "0-1": 0.0}.get(game["result"], 0.5)
+                score = white_score if a_white else 1 - white_score
+                scores.append(score)
+                wins += score == 1
+                draws += score == 0.5
+                losses += score == 0
+                white, black = (player_a, player_b) if a_white else (player_b, player_a)
+                print(f"✅ Game {number}: {white} vs {black} {game['result']} "
+                      f"in {game['plies']} plies ({game['elapsed']:.0f}s)")
+        except KeyboardInterrupt:
+            print("\n⏸️  Interrupted. Results so far:")
+            for future in futures:
+                future.cancel()
+
+    elapsed = time.perf_counter() - start
+    if not scores:
+        print("❌ No games finished.")
+        return
+    estimate, low, high = elo_difference(scores)
+    print(f"\n🏁 {player_a} vs {player_b}: +{wins} ={draws} -{losses} "
+          f"({100 * sum(scores) / len(scores):.1f}% for {player_a})")
+    print(f"📈 Elo difference: {estimate:+.0f} (95% interval {low:+.0f} .. {high:+.0f})")
+    print(f"⏱️  {len(scores)} games in {elapsed / 60:.1f} min ({len(scores) * 3600 / elapsed:.1f} games/hour)")
+    print(f"💾 Games saved as '{pgn_path}'")
+
+if __name__ == "__main__":
+    main()
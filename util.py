@@ -1,26 +1,1216 @@
-import chess,os,random
+import chess,os,random,math
 import chess.pgn
 import chess.engine
+import chess.polyglot
+import chess.syzygy
 import heapq  # For sorting moves by evaluation
+import itertools
 import time
+import json
+import sys
+import contextlib
+import sqlite3
+import queue
+from array import array
+import threading
+from collections import OrderedDict, namedtuple
 
-def save_game_pgn(board, opponent_color):
+class EvalStore:
+    """
+    Persistent position evaluations in a single SQLite file.
+
+    Rows are keyed by Zobrist hash and hold the search depth, score, WDL,
+    best move and, for time-limited searches, the time they were given. A
+    lookup is served when the stored row meets the requested limit: its
+    depth; for a time-limited search, a row searched for at least as long,
+    or one that reached `time_depth`. The table is capped at
+    `max_positions` rows; the least recently used ones are evicted.
+    """
+
+    def __init__(self, path, max_positions=200000, time_depth=16):
+        self.path = path
+        self.max_positions = max_positions
+        self.time_depth = time_depth
+        self.hits = 0
+        self.misses = 0
+        self.pending_writes = 0
+        # Autocommit with WAL: writes never hold a lock for long, so several review workers can share the file.
+        # Calls may come from the stats worker thread; EvalCache serialises them.
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS positions (
+            key INTEGER PRIMARY KEY, depth INTEGER, cp INTEGER, mate INTEGER,
+            wins INTEGER, draws INTEGER, losses INTEGER, best TEXT, used REAL, seconds REAL)""")
+        if "seconds" not in [column[1] for column in self.db.execute("PRAGMA table_info(positions)")]:
+            self.db.execute("ALTER TABLE positions ADD COLUMN seconds REAL")  # Files from before time matching
+        self.db.execute("CREATE INDEX IF NOT EXISTS positions_used ON positions (used)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+
+    @staticmethod
+    def key(board):
+        key = chess.polyglot.zobrist_hash(board)
+        return key - (1 << 64) if key >= (1 << 63) else key  # SQLite integers are signed
+
+    def required_depth(self, limit):
+        return limit.depth if limit.depth is not None else self.time_depth
+
+    def serves(self, depth, seconds, limit, shallower=0):
+        """Whether a row searched to `depth` for `seconds` answers `limit` (for a position `shallower` plies down)."""
+        if depth >= self.required_depth(limit) - shallower:
+            return True
+        return limit.depth is None and limit.time is not None and seconds is not None and seconds >= limit.time
+
+    @staticmethod
+    def seconds(limit):
+        """The time a search was given, when time was its only limit."""
+        if limit is None or limit.depth is not None or limit.nodes is not None:
+            return None
+        return limit.time
+
+    def lookup(self, board, limit):
+        """
+        Return a stored analysis as an engine info dict, or None.
+
+        The info holds depth, score, wdl (when known) and a one-move pv (when known).
+        """
+        row = self.db.execute("SELECT depth, cp, mate, wins, draws, losses, best, seconds FROM positions WHERE key = ?",
+                              (self.key(board),)).fetchone()
+        if row is None or not self.serves(row[0], row[7], limit):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.db.execute("UPDATE positions SET used = ? WHERE key = ?", (time.time(), self.key(board)))
+        depth, cp, mate, wins, draws, losses, best, _ = row
+        score = chess.engine.Mate(mate) if mate is not None else chess.engine.Cp(cp)
+        info = {"depth": depth, "score": chess.engine.PovScore(score, board.turn)}
+        if wins is not None:
+            info["wdl"] = chess.engine.PovWdl(chess.engine.Wdl(wins, draws, losses), board.turn)
+        if best:
+            info["pv"] = [chess.Move.from_uci(best)]
+        return info
+
+    def rank(self, board, limit):
+        """
+        Rank every legal move from stored evaluations of the positions they lead to.
+
+        Returns:
+            list: (score, move) best first, like rank_moves(), or None unless every
+            resulting position is stored at least one ply shallower than `limit` needs.
+        """
+        children = {}
+        for move in board.legal_moves:
+            board.push(move)
+            children[self.key(board)] = move
+            board.pop()
+        if not children:
+            return None
+
+        rows = self.db.execute(f"SELECT key, depth, cp, mate, seconds FROM positions WHERE key IN ({','.join('?' * len(children))})",
+                               list(children)).fetchall()
+        if len(rows) < len(children) or not all(self.serves(depth, seconds, limit, 1) for _, depth, _, _, seconds in rows):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        ranked = []
+        for key, _, cp, mate, _ in rows:
+            score = chess.engine.Mate(mate) if mate is not None else chess.engine.Cp(cp)
+            ranked.append((-score.score(mate_score=10000), children[key]))  # Stored for the opponent
+        ranked.sort(key=lambda x: -x[0])
+        return ranked
+
+    def record(self, board, info, limit=None):
+        """Store an analysis of `board` (made with `limit`, if known) unless a deeper one is already stored."""
+        if "score" not in info or "depth" not in info:
+            return
+        score = info["score"].pov(board.turn)
+        wdl = info["wdl"].pov(board.turn) if "wdl" in info else None
+        best = info["pv"][0].uci() if info.get("pv") else None
+        self.db.execute("""INSERT INTO positions (key, depth, cp, mate, wins, draws, losses, best, used, seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, cp = excluded.cp, mate = excluded.mate,
+                wins = excluded.wins, draws = excluded.draws, losses = excluded.losses,
+                best = COALESCE(excluded.best, best), used = excluded.used,
+                seconds = MAX(COALESCE(excluded.seconds, 0), COALESCE(seconds, 0))
+            WHERE excluded.depth >= positions.depth""",
+            (self.key(board), info["depth"], score.score(), score.mate(),
+             wdl.wins if wdl else None, wdl.draws if wdl else None, wdl.losses if wdl else None,
+             best, time.time(), self.seconds(limit)))
+        self.pending_writes += 1
+        if self.pending_writes >= 64:
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used rows over the size cap."""
+        count = self.db.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        if count > self.max_positions:
+            self.db.execute("DELETE FROM positions WHERE key IN (SELECT key FROM positions ORDER BY used LIMIT ?)",
+                            (count - self.max_positions,))
+        self.pending_writes = 0
+
+    def close(self):
+        """Add this session's hits and misses to the totals, enforce the cap and close the file."""
+        for name, value in (("hits", self.hits), ("misses", self.misses)):
+            self.db.execute("INSERT INTO meta VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                            (name, value))
+        self.hits = self.misses = 0
+        self.evict()
+        self.db.close()
+
+    def stats(self):
+        """Totals for the stats command: positions, size, hits and misses (including this session)."""
+        totals = dict(self.db.execute("SELECT name, value FROM meta").fetchall())
+        return {
+            "positions": self.db.execute("SELECT COUNT(*) FROM positions").fetchone()[0],
+            "max_positions": self.max_positions,
+            "bytes": os.path.getsize(self.path),
+            "hits": totals.get("hits", 0) + self.hits,
+            "misses": totals.get("misses", 0) + self.misses,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = 100 * stats["hits"] / lookups if lookups else 0
+        return (f"🗄️  Eval store: {stats['positions']}/{stats['max_positions']} positions "
+                f"({stats['bytes'] / 1e6:.1f} MB), {stats['hits']} hits / {stats['misses']} misses ({rate:.0f}% hit rate)")
+
+class EvalCache:
+    """
+    In-process LRU cache of engine analyses.
+
+    Entries are keyed by the Zobrist hash of the position plus the search
+    limit (and MultiPV count), so the same position is never searched twice
+    for the same limit during a session. With an EvalStore attached, single
+    line analyses are also read from and written to disk. It is shared by
+    the main thread and the stats worker; the lock is never held during a
+    search.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.store = None
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def key(board, limit, multipv=None):
+        # Clock limits (--tc) are part of the key: the engine spends a different time for every clock reading
+        return (chess.polyglot.zobrist_hash(board), limit.time, limit.depth, limit.nodes, limit.mate,
+                limit.white_clock, limit.black_clock, limit.white_inc, limit.black_inc, limit.remaining_moves, multipv)
+
+    def get(self, key):
+        """Return a cached analysis (and mark it recently used), or None."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, analysis):
+        with self.lock:
+            self.entries[key] = analysis
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)  # Evict the least recently used entry
+
+    def record(self, board, limit, info):
+        """Cache a single-line analysis of `board` made elsewhere (and persist it)."""
+        with self.lock:
+            self.put(self.key(board, limit), info)
+            if self.store is not None:
+                self.store.record(board, info, limit)
+
+    def analyse(self, engine, board, limit, multipv=None):
+        """engine.analyse() through the cache (and the persistent store, if any)."""
+        key = self.key(board, limit, multipv)
+        analysis = self.get(key)
+        if analysis is not None:
+            return analysis
+
+        with self.lock:
+            if self.store is not None and multipv is None:
+                analysis = self.store.lookup(board, limit)
+        if analysis is None:
+            analysis = engine.analyse(board, limit, multipv=multipv)
+            with self.lock:
+                if self.store is not None and multipv is None:
+                    self.store.record(board, analysis, limit)
+        self.put(key, analysis)
+        return analysis
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return f"🧮 Eval cache: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate, {len(self.entries)} positions)"
+
+# Shared by every analysis call site
+eval_cache = EvalCache()
+
+# Everything a turn needs, from one engine search
+TurnResult = namedtuple("TurnResult", ["move", "score", "mate", "wdl", "pv", "depth"])
+
+def turn_search(board, engine, limit, use_store=False, core=None, stop_rule=None, deadline=None, interrupt=None):
+    """
+    Search the position once and return the suggestion together with its analysis.
+
+    The engine's bestmove keeps Skill Level weakening for the chosen move, and
+    its info carries the score, mate distance, WDL and PV, so no separate
+    analyse is needed. With `use_store` (full-strength play only) a deep enough
+    stored evaluation answers without searching. With an EngineCore the search
+    runs on the core and a KeyboardInterrupt stops the engine at once; a
+    StopRule then ends it as soon as the best move is stable, with `limit`
+    (or `deadline` seconds) as the hard cap. With `interrupt`, the search is
+    cancelled and SearchInterrupted raised as soon as interrupt() is true.
+
+    Returns:
+        TurnResult: move, score and wdl (side to move), mate (moves or None), pv and depth.
+    """
+    if use_store:
+        with eval_cache.lock:
+            info = eval_cache.store.lookup(board, limit) if eval_cache.store is not None else None
+        if info is not None and info.get("pv") and info["pv"][0] in board.legal_moves:
+            return make_turn_result(board, limit, info["pv"][0], info)
+
+    if core is not None:
+        search = core.search(engine, board, limit, stop_rule=stop_rule, deadline=deadline)
+        try:
+            move, info = search.result() if interrupt is None else search.wait(interrupt)
+        except KeyboardInterrupt:
+            search.cancel()
+            raise
+        if stop_rule is not None:
+            early_stop.record(search, limit)
+        if profiler.enabled:
+            profiler.record(profiler.names.get(id(engine), "?"), "search", "turn_search", limit, search.elapsed, info)
+        return make_turn_result(board, limit, move, info)
+
+    result = engine.play(board, limit, info=chess.engine.INFO_ALL)
+    return make_turn_result(board, limit, result.move, result.info)
+
+def make_turn_result(board, limit, move, info):
+    """Build a TurnResult from a finished search's best move and info."""
+    if "score" in info:
+        # Later analyses of this position with the same limit can reuse it
+        eval_cache.record(board, limit, info)
+
+    score = info["score"].relative if "score" in info else None
+    return TurnResult(
+        move=move,
+        score=score,
+        mate=score.mate() if score is not None else None,
+        wdl=info["wdl"].relative if "wdl" in info else None,
+        pv=info.get("pv") or [move],
+        depth=info.get("depth", 0),
+    )
+
+class Profiler:
+    """
+    Opt-in latency profile of the assistant (--profile).
+
+    Engines passed to instrument() have their analyse, play and analysis
+    calls recorded with caller, limit, wall time, depth, nodes and nps.
+    main.py times each stage of a turn with stage(); end_turn() prints the
+    turn's breakdown and appends it, with its engine calls, to a JSON-lines
+    trace that can be aggregated across games. Disabled, nothing is wrapped
+    and stage() returns a shared no-op context.
+    """
+
+    LIMIT_FIELDS = ("time", "depth", "nodes", "mate", "white_clock", "black_clock")
+
+    def __init__(self):
+        self.enabled = False
+        self.trace = None
+        self.session = None
+        self.names = {}  # id(engine) -> name given to instrument()
+        self.lock = threading.Lock()  # Calls are also recorded from the stats worker thread
+        self.calls = []
+        self.stages = {}
+        self.turn_start = None
+        self.totals = {}  # stage -> (seconds, turns) over the session
+        self.turns = 0
+        self.null_stage = contextlib.nullcontext()
+
+    def start(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.trace = open(path, "a")
+        self.session = int(time.time())
+        self.enabled = True
+        self.begin_turn()
+
+    def instrument(self, engine, name):
+        """Record every analyse/play/analysis call made on `engine` (no-op unless profiling)."""
+        if not self.enabled:
+            return
+        self.names[id(engine)] = name
+        for method in ("analyse", "play", "analysis"):
+            setattr(engine, method, self.traced(name, method, getattr(engine, method)))
+
+    def traced(self, name, method, call):
+        def traced_call(board, limit=None, *args, **kwargs):
+            caller = self.caller()
+            start = time.perf_counter()
+            result = call(board, limit, *args, **kwargs)
+            if method == "analysis":
+                return TracedAnalysis(self, result, name, caller, limit, start)
+            self.record(name, method, caller, limit, time.perf_counter() - start,
+                        result.info if method == "play" else result)
+            return result
+        return traced_call
+
+    @staticmethod
+    def caller():
+        """The three innermost functions that led to the engine call, outermost first."""
+        frame = sys._getframe(2)
+        names = []
+        while frame is not None and len(names) < 3:
+            names.append(frame.f_code.co_name)
+            frame = frame.f_back
+        return ">".join(reversed(names))
+
+    def record(self, engine_name, method, caller, limit, wall, info):
+        if isinstance(info, list):  # MultiPV analyse: the first line carries depth and nodes
+            info = info[0] if info else {}
+        call = {
+            "engine": engine_name,
+            "method": method,
+            "caller": caller,
+            "limit": {field: getattr(limit, field) for field in self.LIMIT_FIELDS
+                      if limit is not None and getattr(limit, field) is not None},
+            "wall": round(wall, 4),
+            "depth": info.get("depth"),
+            "nodes": info.get("nodes"),
+            "nps": info.get("nps"),
+            "thread": threading.current_thread().name,
+        }
+        with self.lock:
+            self.calls.append(call)
+
+    def stage(self, name):
+        """Context manager timing one stage of the current turn."""
+        if not self.enabled:
+            return self.null_stage
+        return self.timed(name)
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def begin_turn(self):
+        self.stages = {}
+        self.turn_start = time.perf_counter()
+
+    def end_turn(self, ply, move):
+        """Print the turn's breakdown and append it to the trace."""
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.turn_start
+        with self.lock:
+            calls, self.calls = self.calls, []
+        self.turns += 1
+        for name, seconds in self.stages.items():
+            spent, turns = self.totals.get(name, (0.0, 0))
+            self.totals[name] = (spent + seconds, turns + 1)
+
+        stages = " | ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.stages.items())
+        print(f"🔬 Ply {ply} ({move}): {total * 1000:.0f} ms | {stages} | {len(calls)} engine calls")
+        for call in calls:
+            limit = " ".join(f"{field}={value:g}" for field, value in call["limit"].items())
+            print(f"   {call['engine']:<6} {call['method']:<8} {call['wall'] * 1000:>7.0f} ms  depth {call['depth'] or '-':<3} "
+                  f"{(call['nps'] or 0) / 1000:>6.0f} knps  {limit:<18} {call['caller']}")
+
+        for call in calls:
+            self.trace.write(json.dumps({"type": "call", "session": self.session, "ply": ply, **call}) + "\n")
+        self.trace.write(json.dumps({"type": "turn", "session": self.session, "ply": ply, "move": move,
+                                     "total": round(total, 4), "calls": len(calls),
+                                     "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()}}) + "\n")
+        self.trace.flush()
+        self.begin_turn()
+
+    def summary(self):
+        stages = ", ".join(f"{name} {spent * 1000 / turns:.0f}" for name, (spent, turns) in self.totals.items())
+        return f"🔬 Profile: {self.turns} turns, mean ms per stage: {stages}"
+
+    def close(self):
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+        self.enabled = False
+
+class TracedAnalysis:
+    """A SimpleAnalysisResult that reports itself to the Profiler when it is stopped or waited for."""
+
+    def __init__(self, profiler, analysis, engine_name, caller, limit, start):
+        self.profiler = profiler
+        self.analysis = analysis
+        self.engine_name = engine_name
+        self.caller = caller
+        self.limit = limit
+        self.start = start
+        self.recorded = False
+
+    def finish(self):
+        if not self.recorded:
+            self.recorded = True
+            self.profiler.record(self.engine_name, "analysis", self.caller, self.limit,
+                                 time.perf_counter() - self.start, self.analysis.info)
+
+    def stop(self):
+        self.analysis.stop()
+        self.finish()
+
+    def wait(self):
+        best = self.analysis.wait()
+        self.finish()
+        return best
+
+    def __iter__(self):
+        yield from self.analysis
+        self.finish()
+
+    def __enter__(self):
+        self.analysis.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.analysis.__exit__(*exc)
+        self.finish()
+
+    def __getattr__(self, name):
+        return getattr(self.analysis, name)
+
+# Disabled unless main.py is started with --profile
+profiler = Profiler()
+
+class EarlyStop:
+    """Time saved by stopping suggestion searches on a stable best move instead of at the fixed limit."""
+
+    def __init__(self):
+        self.searches = 0
+        self.stopped = 0
+        self.saved = 0.0
+
+    def record(self, search, limit):
+        """Count a finished search made with `limit`, the fixed limit it would otherwise have searched."""
+        self.searches += 1
+        if search.stable_depth is None or search.projected is None:
+            return
+        saved = max(0.0, search.projected - search.stopped_at)
+        self.stopped += 1
+        self.saved += saved
+        parts = []
+        if limit.depth:
+            parts.append(f"depth {limit.depth}")
+        if limit.time:
+            parts.append(f"{limit.time:g}s")
+        fixed = " / ".join(parts) or "the clock budget"
+        print(f"⏱️ Stable at depth {search.stable_depth} after {search.stopped_at:.2f}s "
+              f"(~{saved:.2f}s saved against {fixed}, ~{search.projected:.2f}s)")
+
+    def summary(self):
+        return (f"⏱️ Early stop: {self.stopped}/{self.searches} searches ended on a stable best move, "
+                f"~{self.saved:.1f}s saved against the fixed limit")
+
+# Shared by every suggestion search
+early_stop = EarlyStop()
+
+class GameClock:
+    """
+    Both players' clocks for a game played under a time control such as 5+3.
+
+    The clocks are advanced from wall-clock timestamps: press() is called
+    when a player's move is entered or shown, like hitting a chess clock.
+    budget() gives the assistant's side a think time for the next move
+    from its remaining time, the increment, the game phase and how tense
+    the position is.
+    """
+
+    # Moves still expected from the assistant's side in each phase
+    MOVES_LEFT = {"Opening": 35, "Middlegame": 25, "Endgame": 15}
+
+    def __init__(self, minutes, increment, color):
+        self.remaining = {chess.WHITE: minutes * 60.0, chess.BLACK: minutes * 60.0}
+        self.increment = increment
+        self.color = color  # The side the assistant plays for
+        self.last = None
+        self.budgets = []  # (budget, used) per move of the assistant's side
+
+    @staticmethod
+    def parse(control):
+        """'5+3' -> (5.0, 3.0): minutes per side and increment in seconds."""
+        minutes, _, increment = control.partition("+")
+        return float(minutes), float(increment or 0)
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def press(self, color):
+        """`color` has just moved: charge the time since the last press and add the increment."""
+        now = time.perf_counter()
+        used = now - self.last
+        self.remaining[color] += self.increment - used
+        self.last = now
+        return used
+
+    def tension(self, board):
+        """Cheap complexity factor: short for near-forced moves, longer when captures and checks abound."""
+        moves = list(board.legal_moves)
+        if len(moves) <= 2:
+            return 0.3
+        if board.is_check():
+            return 0.8
+        forcing = sum(1 for move in moves if board.is_capture(move) or board.gives_check(move))
+        return 1.3 if forcing >= 4 else 1.0
+
+    def budget(self, board):
+        """Seconds to spend on the assistant's next move."""
+        remaining = self.remaining[self.color]
+        budget = remaining / self.MOVES_LEFT[detect_game_phase(board)] + 0.75 * self.increment
+        budget *= self.tension(board)
+        # Never spend more than a quarter of the clock, and keep a second in hand
+        return max(0.1, min(budget, remaining / 4, remaining - 1.0))
+
+    def limit(self):
+        """Engine limit with both clocks, so the engine's own time management sees the real game."""
+        return chess.engine.Limit(white_clock=max(0.1, self.remaining[chess.WHITE]),
+                                  black_clock=max(0.1, self.remaining[chess.BLACK]),
+                                  white_inc=self.increment, black_inc=self.increment)
+
+    def record(self, budget, used):
+        self.budgets.append((budget, used))
+        print(f"⏱️ Budget {budget:.1f}s, used {used:.1f}s | ⚪ {self.show(chess.WHITE)}  ⚫ {self.show(chess.BLACK)}")
+
+    def show(self, color):
+        seconds = max(0.0, self.remaining[color])
+        return f"{int(seconds // 60)}:{seconds % 60:04.1f}"
+
+    def summary(self):
+        if not self.budgets:
+            return "⏱️ Clock: no moves timed"
+        budget = sum(b for b, _ in self.budgets)
+        used = sum(u for _, u in self.budgets)
+        over = sum(1 for b, u in self.budgets if u > b)
+        return (f"⏱️ Clock: {used:.1f}s used of {budget:.1f}s budgeted over {len(self.budgets)} moves "
+                f"({over} over budget), ⚪ {self.show(chess.WHITE)}  ⚫ {self.show(chess.BLACK)} left")
+
+class Ponder:
+    """
+    Background search on the opponent's expected reply while the prompt is open.
+
+    After a suggestion, start() searches the position after the reply
+    predicted by the suggestion's PV, as a cancellable Search on the
+    EngineCore. If the opponent plays that reply, resolve() answers from
+    the ponder search; otherwise it is cancelled.
+    """
+
+    def __init__(self, core):
+        self.core = core
+        self.search = None
+        self.board = None
+        self.predicted = None
+        self.limit = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, board, engine, turn, limit):
+        """Ponder on turn's predicted reply. `board` is the position after our move."""
+        self.stop()
+        # pv[0] is our move, pv[1] the reply the engine expects
+        if len(turn.pv) < 2 or turn.pv[0] != turn.move or turn.pv[1] not in board.legal_moves:
+            return
+
+        self.board = board.copy()
+        self.board.push(turn.pv[1])
+        if self.board.is_game_over():
+            self.board = None
+            return
+
+        self.predicted = turn.pv[1]
+        self.limit = limit
+        self.search = self.core.search(engine, self.board, limit)
+
+    def stop(self):
+        """Cancel the ponder search, if any; the engine is told to stop at once."""
+        if self.search is not None:
+            self.search.cancel()
+        self.search = None
+        self.board = None
+        self.predicted = None
+
+    def resolve(self, board):
+        """
+        Call right after the opponent's move is pushed, before any other engine use.
+
+        Returns:
+            TurnResult for the current position on a ponder hit, otherwise None.
+        """
+        if self.search is None:
+            return None
+
+        if board.peek() != self.predicted or chess.polyglot.zobrist_hash(board) != chess.polyglot.zobrist_hash(self.board):
+            self.misses += 1
+            self.stop()
+            return None
+
+        # The search has been running since the prompt opened; finish it within its limit
+        move, info = self.search.result()
+        self.search = None
+        self.board = None
+        self.predicted = None
+        if move is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return make_turn_result(board, self.limit, move, info)
+
+    def summary(self):
+        guesses = self.hits + self.misses
+        rate = 100 * self.hits / guesses if guesses else 0
+        return f"🔮 Ponder: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate)"
+
+class EnginePool:
+    """A small pool of extra, already configured Stockfish processes (on an EngineCore if given)."""
+
+    def __init__(self, engine_path, size, options, core=None):
+        self.engines = []
+        for _ in range(size):
+            if core is not None:
+                engine = core.open_engine(engine_path, options)
+            else:
+                engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+                engine.configure(options)
+            self.engines.append(engine)
+
+    def __len__(self):
+        return len(self.engines)
+
+    def configure(self, options):
+        """Apply option changes made to the main engine (e.g. by Adaptive mode) to every pool engine."""
+        for engine in self.engines:
+            engine.configure(options)
+
+    def quit(self):
+        for engine in self.engines:
+            engine.quit()
+        self.engines = []
+
+class Speculator:
+    """
+    Precompute our reply to the opponent's K most likely moves on an engine pool.
+
+    While the prompt is open, each pool engine searches the position after one
+    of the top-K opponent moves (ranked by a short MultiPV search). Searches
+    are keyed by the Zobrist hash of the resulting position, so resolve() can
+    answer from whichever one the opponent actually reached.
+    """
+
+    def __init__(self, pool, rank_time=0.3):
+        self.pool = pool
+        self.rank_time = rank_time
+        self.searches = {}  # Zobrist hash -> (limit, analysis)
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, board, engine, limit):
+        """Rank the opponent's replies on `engine` and search the top ones on the pool."""
+        self.stop()
+        if board.is_game_over():
+            return
+
+        candidates = rank_moves(board, engine, self.rank_time, multipv=len(self.pool))
+        for (_, move), pool_engine in zip(candidates, self.pool.engines):
+            after = board.copy()
+            after.push(move)
+            if after.is_game_over():
+                continue
+            key = chess.polyglot.zobrist_hash(after)
+            self.searches[key] = (limit, pool_engine.analysis(after, limit, info=chess.engine.INFO_ALL))
+
+    def stop(self):
+        """Cancel every running speculative search."""
+        for _, analysis in self.searches.values():
+            analysis.stop()
+            analysis.wait()
+        self.searches = {}
+
+    def resolve(self, board):
+        """
+        Call after the opponent's move is pushed.
+
+        Returns:
+            TurnResult for the current position if it was precomputed, otherwise None.
+        """
+        if not self.searches:
+            return None
+
+        entry = self.searches.pop(chess.polyglot.zobrist_hash(board), None)
+        self.stop()  # The other guesses are no longer needed
+        if entry is None:
+            self.misses += 1
+            return None
+
+        limit, analysis = entry
+        best = analysis.wait()
+        if best.move is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return make_turn_result(board, limit, best.move, analysis.info)
+
+    def summary(self):
+        guesses = self.hits + self.misses
+        rate = 100 * self.hits / guesses if guesses else 0
+        return f"🧠 Speculation: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate, {len(self.pool)} engines)"
+
+class Tablebase:
+    """
+    Local Syzygy tablebases, opened once and kept for the session.
+
+    Positions they cover are answered with a WDL/DTZ-perfect move and a
+    win/draw/loss verdict without any engine search.
+    """
+
+    WDL_NAMES = {2: "win", 1: "cursed win (draw by 50-move rule)", 0: "draw",
+                 -1: "blessed loss (draw by 50-move rule)", -2: "loss"}
+
+    def __init__(self):
+        self.tablebase = None
+        self.answered = 0
+
+    def open(self, path):
+        if self.tablebase is None:
+            self.tablebase = chess.syzygy.open_tablebase(path)
+        else:
+            self.tablebase.add_directory(path)
+
+    def probe(self, board):
+        """(wdl, dtz) for the side to move, or None if the tablebases don't cover the position."""
+        if self.tablebase is None:
+            return None
+        wdl = self.tablebase.get_wdl(board)
+        if wdl is None:
+            return None
+        dtz = self.tablebase.get_dtz(board)
+        return (wdl, dtz) if dtz is not None else None
+
+    def verdict(self, board):
+        """Human readable verdict for the side to move, or None."""
+        probe = self.probe(board)
+        if probe is None:
+            return None
+        wdl, dtz = probe
+        return f"{self.WDL_NAMES[wdl]} (DTZ {abs(dtz)})" if wdl else self.WDL_NAMES[wdl]
+
+    def best_move(self, board):
+        """
+        The move that keeps the best WDL result and makes the most of DTZ:
+        mate first, then the fastest zeroing/conversion when winning and the
+        slowest when losing.
+
+        Returns:
+            (move, wdl, dtz) for the side to move, or None if any move leaves the tablebases.
+        """
+        probe = self.probe(board)
+        if probe is None:
+            return None
+
+        candidates = []
+        for move in board.legal_moves:
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            if board.is_checkmate():
+                board.pop()
+                return move, probe[0], probe[1]
+            child = self.probe(board)
+            board.pop()
+            if child is None:
+                return None
+            child_wdl, child_dtz = child
+            result = -child_wdl
+            if result > 0:
+                # Winning: zeroing moves first, then the shortest way to the next zeroing move
+                order = (result, zeroing, child_dtz)
+            elif result < 0:
+                # Losing: avoid zeroing moves and delay as long as possible
+                order = (result, not zeroing, child_dtz)
+            else:
+                order = (result, 0, 0)
+            candidates.append((order, move))
+
+        if not candidates:
+            return None
+        return max(candidates, key=lambda x: x[0])[1], probe[0], probe[1]
+
+    def turn(self, board):
+        """A TurnResult answered from the tablebases, or None."""
+        best = self.best_move(board)
+        if best is None:
+            return None
+        move, wdl, dtz = best
+        self.answered += 1
+        # Engine-style tablebase scores: decisive but below any mate score
+        score = chess.engine.Cp(0 if abs(wdl) < 2 else (20000 - abs(dtz)) * (1 if wdl > 0 else -1))
+        return TurnResult(move=move, score=score, mate=None, wdl=None, pv=[move], depth=0)
+
+    def close(self):
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+
+# Opened by main.py when a tablebase directory is configured
+tablebase = Tablebase()
+
+class OpeningBook:
+    """
+    Opening moves from a Polyglot book file and/or our own games/ archive.
+
+    The archive book is an OpeningExplorer table of the moves "Me" played
+    (every move when the PGN does not say who we were) in the first plies
+    of each saved game, cached in games/book.bin. Moves seen fewer than
+    `min_count` times are ignored.
+    """
+
+    def __init__(self, polyglot_path=None, archive=None, min_count=2):
+        self.reader = chess.polyglot.open_reader(polyglot_path) if polyglot_path else None
+        self.min_count = min_count
+        self.archive = archive
+
+    def __len__(self):
+        return len(self.archive) if self.archive is not None else 0
+
+    def entries(self, board):
+        """Book moves for the position with their weights (Polyglot and archive combined)."""
+        weights = {}
+        if self.reader is not None:
+            for entry in self.reader.find_all(board):
+                weights[entry.move] = weights.get(entry.move, 0) + entry.weight
+        for move, count, *_ in self.archive.lookup(board) if self.archive is not None else ():
+            if count >= self.min_count:
+                weights[move] = weights.get(move, 0) + count
+        return weights
+
+    def choose(self, board, selection="best"):
+        """Pick a book move: the heaviest one ('best') or at random by weight ('weighted'). None if out of book."""
+        weights = self.entries(board)
+        if not weights:
+            return None
+        if selection == "weighted":
+            moves = list(weights)
+            return random.choices(moves, weights=[max(weights[move], 1) for move in moves])[0]
+        return max(weights, key=weights.get)
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+def mine_colors(headers):
+    """The colors "Me" played in a saved game (both when the headers don't say)."""
+    return {color for color, header in ((chess.WHITE, "White"), (chess.BLACK, "Black"))
+            if headers.get(header) == "Me"} or {chess.WHITE, chess.BLACK}
+
+class OpeningVisitor(chess.pgn.BaseVisitor):
+    """
+    Collects (Zobrist hash, move) for the first `max_plies` mainline moves and the result, without parsing the rest.
+
+    With `mine_only`, only the moves "Me" played are collected.
+    """
+
+    def __init__(self, max_plies, mine_only=False):
+        self.max_plies = max_plies
+        self.mine_only = mine_only
+
+    def begin_game(self):
+        self.headers = chess.pgn.Headers()
+        self.positions = []
+        self.plies = 0
+
+    def begin_headers(self):
+        return self.headers
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def begin_parse_san(self, board, san):
+        if self.plies >= self.max_plies:
+            return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        self.plies += 1
+        if not self.mine_only or board.turn in mine_colors(self.headers):
+            self.positions.append((chess.polyglot.zobrist_hash(board), move))
+
+    def handle_error(self, error):
+        # Like GameBuilder: log it and keep the moves before it; the parser skips the rest of the game
+        chess.pgn.LOGGER.error("%s while parsing %s", error, self.headers)
+
+    def result(self):
+        return self.headers.get("Result", "*"), self.positions
+
+class OpeningExplorer:
+    """
+    What was played from each opening position in the games/ archive, and how it scored.
+
+    Every (position, move) pair of the first `max_plies` plies is one row of
+    parallel typed arrays: Zobrist hash, packed move, games, White wins,
+    draws and Black wins. A dict maps each hash to its rows, so a lookup
+    costs a few microseconds. The table is kept in `path` with the size
+    and mtime of each file it was built from: refresh() only parses new
+    files and rebuilds when a known one changed or disappeared. Games
+    saved during the session are added as they are written. With
+    `mine_only` only the moves "Me" played are counted (the archive book).
+    """
+
+    RESULTS = {"1-0": 0, "1/2-1/2": 1, "0-1": 2}
+
+    def __init__(self, directory="games", path="games/explorer.bin", max_plies=30, mine_only=False):
+        self.directory = directory
+        self.path = path
+        self.max_plies = max_plies
+        self.mine_only = mine_only
+        self.loaded = False
+        self.lock = threading.Lock()  # Saved games are added from the core's worker threads
+        self.reset()
+
+    def reset(self):
+        self.keys = array("Q")
+        self.moves = array("H")
+        self.games = array("L")
+        self.white_wins = array("L")
+        self.draws = array("L")
+        self.black_wins = array("L")
+        self.rows = {}  # Zobrist hash -> {packed move: row}
+        self.files = {}  # File name -> [size, mtime] of the files counted
+
+    @staticmethod
+    def pack(move):
+        return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+    @staticmethod
+    def unpack(code):
+        return chess.Move(code & 63, code >> 6 & 63, code >> 12 or None)
+
+    def add_positions(self, result, positions):
+        outcome = self.RESULTS.get(result)
+        for key, move in positions:
+            code = self.pack(move)
+            moves = self.rows.setdefault(key, {})
+            row = moves.get(code)
+            if row is None:
+                row = moves[code] = len(self.keys)
+                self.keys.append(key)
+                self.moves.append(code)
+                for column in (self.games, self.white_wins, self.draws, self.black_wins):
+                    column.append(0)
+            self.games[row] += 1
+            if outcome is not None:
+                (self.white_wins, self.draws, self.black_wins)[outcome][row] += 1
+
+    def add_file(self, name):
+        file_path = os.path.join(self.directory, name)
+        stat = os.stat(file_path)
+        try:
+            with open(file_path) as pgn_file:
+                while True:
+                    parsed = chess.pgn.read_game(pgn_file, Visitor=lambda: OpeningVisitor(self.max_plies, self.mine_only))
+                    if parsed is None:
+                        break
+                    self.add_positions(*parsed)
+        except (OSError, ValueError) as error:
+            print(f"⚠️ Explorer skipped the rest of {name}: {error}")
+        self.files[name] = [stat.st_size, stat.st_mtime]  # Not parsed again until it changes
+
+    def add_saved(self, file_path, game):
+        """Count a game just written to `file_path` (only once the table is in use)."""
+        name = os.path.basename(file_path)
+        if not self.loaded or os.path.dirname(os.path.abspath(file_path)) != os.path.abspath(self.directory):
+            return
+        if name in self.files:
+            return  # Overwritten: its old games are still counted, the next refresh() rebuilds
+        mine = mine_colors(game.headers) if self.mine_only else {chess.WHITE, chess.BLACK}
+        board = game.board()
+        positions = []
+        for move in itertools.islice(game.mainline_moves(), self.max_plies):
+            if board.turn in mine:
+                positions.append((chess.polyglot.zobrist_hash(board), move))
+            board.push(move)
+        stat = os.stat(file_path)
+        with self.lock:
+            self.add_positions(game.headers.get("Result", "*"), positions)
+            self.files[name] = [stat.st_size, stat.st_mtime]
+
+    def refresh(self):
+        """
+        Load the table and bring it up to date with the PGN files.
+
+        Returns:
+            int: number of files parsed.
+        """
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pgn") and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_size, stat.st_mtime]
+
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            if any(files.get(name) != signature for name, signature in self.files.items()):
+                self.reset()  # A counted file changed or is gone: its games can't be taken back one by one
+            new = sorted(name for name in files if name not in self.files)
+            for name in new:
+                self.add_file(name)
+            self.loaded = True
+            if new:
+                self.save()
+        return len(new)
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as file:
+                header = json.loads(file.readline())
+                if header.get("max_plies") != self.max_plies or header.get("mine_only", False) != self.mine_only:
+                    return
+                size = header["rows"]
+                for column in (self.keys, self.moves, self.games, self.white_wins, self.draws, self.black_wins):
+                    column.fromfile(file, size)
+        except (OSError, ValueError, EOFError, KeyError):
+            self.reset()
+            return
+        self.files = header["files"]
+        for row, (key, code) in enumerate(zip(self.keys, self.moves)):
+            self.rows.setdefault(key, {})[code] = row
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "wb") as file:
+            header = {"max_plies": self.max_plies, "mine_only": self.mine_only, "rows": len(self.keys), "files": self.files}
+            file.write(json.dumps(header).encode() + b"\n")
+            for column in (self.keys, self.moves, self.games, self.white_wins, self.draws, self.black_wins):
+                column.tofile(file)
+        os.replace(self.path + ".tmp", self.path)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, board):
+        """
+        Moves played from `board` before, most played first.
+
+        Returns:
+            list: (move, games, wins, draws, losses), counted for the side to move.
+        """
+        with self.lock:
+            rows = list(self.rows.get(chess.polyglot.zobrist_hash(board), {}).values())
+            entries = []
+            for row in rows:
+                wins, losses = self.white_wins[row], self.black_wins[row]
+                if board.turn == chess.BLACK:
+                    wins, losses = losses, wins
+                entries.append((self.unpack(self.moves[row]), self.games[row], wins, self.draws[row], losses))
+        entries = [entry for entry in entries if entry[0] in board.legal_moves]  # Guards against hash collisions
+        return sorted(entries, key=lambda entry: -entry[1])
+
+    @staticmethod
+    def score(entry):
+        """Score of a lookup entry for the side that played it, over its finished games (None if none finished)."""
+        _, _, wins, draws, losses = entry
+        finished = wins + draws + losses
+        return (wins + draws / 2) / finished if finished else None
+
+    def describe(self, board, limit=5):
+        """One line summary of lookup(), or None when the position was never reached."""
+        entries = self.lookup(board)
+        if not entries:
+            return None
+        parts = []
+        for entry in entries[:limit]:
+            score = self.score(entry)
+            parts.append(f"{board.san(entry[0])} ×{entry[1]}" + (f" ({score:.0%})" if score is not None else ""))
+        more = f", +{len(entries) - limit} more" if len(entries) > limit else ""
+        return ", ".join(parts) + more
+
+    def prefer(self, board, engine, turn, margin, time_limit=1.0, min_games=3):
+        """
+        Use the archive as a prior on the suggestion.
+
+        The move that scored best here (over at least `min_games` finished
+        games) replaces the engine's choice when the engine rates it at most
+        `margin` centipawns worse.
+
+        Returns:
+            tuple: (TurnResult, the lookup entry of the preferred move or None)
+        """
+        if turn.depth == 0 or turn.score is None or turn.mate is not None:
+            return turn, None
+        candidates = [entry for entry in self.lookup(board)
+                      if entry[2] + entry[3] + entry[4] >= min_games]
+        if not candidates:
+            return turn, None
+        best = max(candidates, key=self.score)
+        if best[0] == turn.move:
+            return turn, None
+
+        mover = board.turn
+        board.push(best[0])
+        try:
+            info = eval_cache.analyse(engine, board, chess.engine.Limit(depth=max(turn.depth - 1, 1), time=time_limit))
+        finally:
+            board.pop()
+        score = info["score"].pov(mover)
+        if turn.score.score(mate_score=100000) - score.score(mate_score=100000) > margin:
+            return turn, None
+        return TurnResult(
+            move=best[0],
+            score=score,
+            mate=score.mate(),
+            wdl=info["wdl"].pov(mover) if "wdl" in info else None,
+            pv=[best[0]] + list(info.get("pv") or []),
+            depth=info.get("depth", 0),
+        ), best
+
+# Loaded by main.py with --explorer and --book
+opening_explorer = OpeningExplorer()
+book_archive = OpeningExplorer(path="games/book.bin", max_plies=20, mine_only=True)
+
+def save_game_pgn(board, opponent_color, headers=None, ledger=None):
     """
     Save the completed chess game in PGN format with a Unix timestamp.
 
     Args:
         board (chess.Board): The chess board containing the game history.
         opponent_color (str): 'w' if the opponent played as White, 'b' if Black.
+        headers (dict): Extra PGN headers to record (optional).
+        ledger (StatsLedger): Move statistics to keep with the game (optional).
     """
     # Create PGN game object
     game = chess.pgn.Game()
     game.headers["White"] = "Me" if opponent_color == 'b' else "Opponent"
     game.headers["Black"] = "Opponent" if opponent_color == 'b' else "Me"
+    game.headers.update(headers or {})
     node = game
 
     # Add all moves from the board to the PGN game
     for move in board.move_stack:
         node = node.add_variation(move)
+    if ledger is not None:
+        ledger.annotate(game)
 
     # Ensure the games directory exists
     if not os.path.exists("games"):
@@ -34,24 +1224,70 @@ def save_game_pgn(board, opponent_color):
     with open(file_name, "w") as pgn_file:
         exporter = chess.pgn.FileExporter(pgn_file)
         game.accept(exporter)
+    game_archive.add(file_name, game, board)
+    opening_explorer.add_saved(file_name, game)
+    book_archive.add_saved(file_name, game)
 
     print(f"\n🏁 Game Over! Saved as '{file_name}'")
 
-def make_blunder(board, engine, blunder_chance=0.1):
+def rank_moves(board, engine, time_limit=1.0, multipv=None):
+    """
+    Rank every legal move with a single MultiPV search.
+
+    Args:
+        board (chess.Board): Position to rank moves for.
+        engine: Stockfish engine instance.
+        time_limit (float): Total search time in seconds for the whole ranking.
+        multipv (int): Only rank this many top moves (default: all legal moves).
+
+    A full ranking is served from the eval store when every resulting position
+    is stored deep enough, and feeds the store otherwise.
+
+    Returns:
+        list: (score, move) tuples from the side to move's point of view, best first.
+    """
+    legal_count = board.legal_moves.count()
+    if legal_count == 0:
+        return []
+    limit = chess.engine.Limit(time=time_limit)
+    store = eval_cache.store
+    if multipv is not None:
+        legal_count = min(multipv, legal_count)
+    elif store is not None:
+        with eval_cache.lock:
+            ranked = store.rank(board, limit)
+        if ranked is not None:
+            return ranked
+
+    analysis = eval_cache.analyse(engine, board, limit, multipv=legal_count)
+    ranked = []
+    for info in analysis:
+        if not info.get("pv") or "score" not in info:
+            continue
+        score = info["score"].relative.score(mate_score=10000)
+        ranked.append((score, info["pv"][0]))
+
+        if store is not None:
+            # Each line is also an evaluation, one ply shallower, of the position its move leads to. It only
+            # got a share of the search time, so it is stored without one: only its depth can make it serve
+            board.push(info["pv"][0])
+            child = {"depth": info.get("depth", 1) - 1, "score": info["score"], "pv": info["pv"][1:]}
+            if "wdl" in info:
+                child["wdl"] = info["wdl"]
+            with eval_cache.lock:
+                store.record(board, child)
+            board.pop()
+    return ranked
+
+def make_blunder(board, engine, blunder_chance=0.1, time_limit=1.0):
     """Force the engine to make a blunder with a probability."""
     if random.random() > blunder_chance:
         return None  # No blunder, return control to normal move
 
-    legal_moves = list(board.legal_moves)
-    move_evals = []
-
-    # Analyze all legal moves and store their evaluations
-    for move in legal_moves:
-        board.push(move)
-        analysis = engine.analyse(board, chess.engine.Limit(time=0.5), info=chess.engine.INFO_SCORE)
-        score = analysis["score"].relative.score(mate_score=10000) or 0
-        board.pop()
-        move_evals.append((score, move))
+    # One MultiPV search ranks all legal moves within the time budget
+    move_evals = rank_moves(board, engine, time_limit)
+    if not move_evals:
+        return None
 
     # Sort moves by evaluation (from best to worst)
     worst_moves = heapq.nsmallest(3, move_evals, key=lambda x: x[0])  # Get the 3 worst moves
@@ -67,6 +1303,12 @@ def make_blunder(board, engine, blunder_chance=0.1):
     return blunder_move
 
 def detect_tactics(board, color):
+    """
+    Detect tactical motifs around `color`'s pieces.
+
+    Works on attack and pin masks, and inspects each legal move once with
+    push/pop instead of copying the board per piece and move.
+    """
     tactics = {
         "pins": [],
         "skewers": [],
@@ -89,68 +1331,76 @@ def detect_tactics(board, color):
 
     # Only consider high-value pieces (knight, bishop, rook, queen, king)
     high_value_pieces = {chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING}
+    own_pieces = board.occupied_co[color] & ~board.pawns
 
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-
-        if piece and piece.color == color and piece.piece_type in high_value_pieces:
-            # PIN DETECTION
-            if board.is_pinned(color, square):
-                tactics["pins"].append(chess.square_name(square))
-
-            # FORK DETECTION
-            attackers = board.attackers(color, square)
-            if len(attackers) > 1:
-                tactics["forks"].append(chess.square_name(square))
-
-            # OVERLOADING DETECTION
-            attackers = list(board.attackers(not color, square))
-            defenders = list(board.attackers(color, square))
-            if len(attackers) > 0 and len(defenders) == 1:
-                tactics["overloading"].append(chess.square_name(square))
-
-            # INTERFERENCE DETECTION (Simplified)
-            for move in board.legal_moves:
-                if move.from_square == square:
-                    temp_board = board.copy()
-                    temp_board.push(move)
-                    if board.is_attacked_by(not color, move.to_square) and not temp_board.is_attacked_by(not color, move.to_square):
-                        tactics["interference"].append(chess.square_name(move.to_square))
-
-            # DECOY DETECTION
-            for move in board.legal_moves:
-                if move.from_square == square:
-                    temp_board = board.copy()
-                    temp_board.push(move)
-                    if temp_board.is_check():
-                        tactics["decoys"].append(chess.square_name(move.to_square))
-
-            # SMOTHERED MATE CHECK
-            if piece.piece_type == chess.KNIGHT:
-                for move in board.legal_moves:
-                    if move.from_square == square:
-                        temp_board = board.copy()
-                        temp_board.push(move)
-                        if temp_board.is_checkmate():
-                            king_square = temp_board.king(not color)
-                            if all(temp_board.piece_at(sq) and temp_board.piece_at(sq).color != color
-                                   for sq in chess.SQUARES if chess.square_distance(king_square, sq) == 1):
-                                tactics["smothered_mate"].append(chess.square_name(king_square))
-
-            # ZWISCHENZUG (In-Between Moves)
-            if piece.piece_type != chess.KING:
-                for move in board.legal_moves:
-                    temp_board = board.copy()
-                    temp_board.push(move)
-                    if temp_board.is_check() and not board.is_check():
-                        tactics["zwischenzug"].append(chess.square_name(move.to_square))
-
-            # UNDERPROMOTION TRAP (Check if promoting to a piece other than queen gives better result)
-            if piece.piece_type == chess.PAWN:
-                if (color == chess.WHITE and chess.square_rank(square) == 6) or (color == chess.BLACK and chess.square_rank(square) == 1):
-                    tactics["underpromotion_trap"].append(chess.square_name(square))
-
-    return tactics 
+    # Look at every legal move once: group by origin and remember which ones give check
+    moves_from = {}
+    checking_moves = []
+    for move in board.legal_moves:
+        gives_check = board.gives_check(move)
+        moves_from.setdefault(move.from_square, []).append((move, gives_check))
+        if gives_check:
+            checking_moves.append(chess.square_name(move.to_square))
+
+    # ZWISCHENZUG (In-Between Moves): the same checking moves are reported for every non-king piece
+    zwischenzug = [] if board.is_check() else checking_moves
+
+    for square in chess.scan_forward(own_pieces):
+        piece_type = board.piece_type_at(square)
+        if piece_type not in high_value_pieces:
+            continue
+        name = chess.square_name(square)
+
+        # PIN DETECTION
+        if board.pin_mask(color, square) != chess.BB_ALL:
+            tactics["pins"].append(name)
+
+        # FORK DETECTION
+        defenders = chess.popcount(board.attackers_mask(color, square))
+        if defenders > 1:
+            tactics["forks"].append(name)
+
+        # OVERLOADING DETECTION
+        if defenders == 1 and board.attackers_mask(not color, square):
+            tactics["overloading"].append(name)
+
+        piece_moves = moves_from.get(square, [])
+
+        # INTERFERENCE DETECTION (Simplified)
+        for move, _ in piece_moves:
+            if board.is_attacked_by(not color, move.to_square):
+                board.push(move)
+                still_attacked = board.is_attacked_by(not color, move.to_square)
+                board.pop()
+                if not still_attacked:
+                    tactics["interference"].append(chess.square_name(move.to_square))
+
+        # DECOY DETECTION
+        for move, gives_check in piece_moves:
+            if gives_check:
+                tactics["decoys"].append(chess.square_name(move.to_square))
+
+        # SMOTHERED MATE CHECK: mate where every square around the king holds its own pieces
+        if piece_type == chess.KNIGHT:
+            for move, gives_check in piece_moves:
+                if not gives_check:
+                    continue
+                board.push(move)
+                if board.is_checkmate():
+                    king_square = board.king(not color)
+                    if not chess.BB_KING_ATTACKS[king_square] & ~board.occupied_co[not color]:
+                        tactics["smothered_mate"].append(chess.square_name(king_square))
+                board.pop()
+
+        if piece_type != chess.KING:
+            tactics["zwischenzug"].extend(zwischenzug)
+
+        # UNDERPROMOTION TRAP (Check if promoting to a piece other than queen gives better result)
+        if piece_type == chess.PAWN:
+            if (color == chess.WHITE and chess.square_rank(square) == 6) or (color == chess.BLACK and chess.square_rank(square) == 1):
+                tactics["underpromotion_trap"].append(name)
+
+    return tactics
 
 def detect_game_phase(board):
     """Detect the current phase of the game based on move count and remaining pieces."""
@@ -164,30 +1414,90 @@ def detect_game_phase(board):
     else:
         return "Middlegame"
 
-def is_position_complex(board, engine):
-    """Detect if the position is complex based on the evaluation spread of legal moves."""
-    evaluations = []
-    for move in board.legal_moves:
-        board.push(move)
-        analysis = engine.analyse(board, chess.engine.Limit(time=0.5), info=chess.engine.INFO_SCORE)
-        score = analysis["score"].relative.score(mate_score=10000)
-        if score is not None:
-            evaluations.append(score)
-        board.pop()
+# Evaluation range (best - worst move, centipawns) above which a position counts as complex;
+# calibrated against the old per-move scan with `python bench.py complexity`
+COMPLEX_RANGE = 150
+
+def position_complexity(board, engine, time_limit=1.0, top_n=3, lines=5, scan_depth=8):
+    """
+    Measure how complex a position is from two MultiPV searches.
+
+    The best `lines` moves share the `time_limit` budget, so each of them is
+    searched properly; the other legal moves are then searched together to
+    `scan_depth`, deep enough to see a piece left hanging. The evaluation
+    range is the same best - worst spread the old per-move scan measured,
+    without one search per legal move.
+
+    Returns:
+        dict: score (best line, side to move), eval_range (best - worst move),
+        top_spread (best - top_n-th line), wdl_entropy (bits, best line),
+        pv_changes (how often the best move changed between depths; only
+        measured when the search is not served from the cache) and depth.
+    """
+    legal_count = board.legal_moves.count()
+    metrics = {"score": 0, "eval_range": 0, "top_spread": 0, "wdl_entropy": 0.0, "pv_changes": 0, "depth": 0}
+    if legal_count == 0:
+        return metrics
+
+    limit = chess.engine.Limit(time=time_limit)
+    key = eval_cache.key(board, limit, ("complexity", lines, scan_depth))
+    cached = eval_cache.get(key)
+    if cached is not None:
+        top, rest = cached
+    else:
+        top = {}
+        best_move = None
+        with engine.analysis(board, limit, multipv=min(lines, legal_count)) as analysis:
+            for info in analysis:
+                if "score" not in info or not info.get("pv"):
+                    continue
+                top[info.get("multipv", 1)] = info
+                if info.get("multipv", 1) == 1:
+                    if best_move is not None and info["pv"][0] != best_move:
+                        metrics["pv_changes"] += 1
+                    best_move = info["pv"][0]
+        top = [top[n] for n in sorted(top)]
+        searched = {info["pv"][0] for info in top}
+        others = [move for move in board.legal_moves if move not in searched]
+        rest = []
+        if others:
+            rest = engine.analyse(board, chess.engine.Limit(depth=scan_depth), multipv=len(others), root_moves=others)
+            rest = [info for info in rest if "score" in info]
+        eval_cache.put(key, (top, rest))
 
-    if not evaluations:
-        return False
+    if not top:
+        return metrics
+    top_scores = [info["score"].relative.score(mate_score=10000) for info in top]
+    scores = top_scores + [info["score"].relative.score(mate_score=10000) for info in rest]
 
-    eval_range = max(evaluations) - min(evaluations)
-    return eval_range > 150  # Complex if evaluation range is wide
+    best = top[0]
+    metrics["score"] = top_scores[0]
+    metrics["eval_range"] = max(scores) - min(scores)
+    metrics["top_spread"] = top_scores[0] - top_scores[min(top_n, len(top_scores)) - 1]
+    metrics["depth"] = best.get("depth", 0)
+    if "wdl" in best:
+        wdl = best["wdl"].relative
+        total = wdl.total() or 1
+        metrics["wdl_entropy"] = -sum(p * math.log2(p) for p in (wdl.wins / total, wdl.draws / total, wdl.losses / total) if p > 0)
+    return metrics
 
-def adjust_adaptive_mode(board, engine, args):
-    """Enhanced adaptive logic that adjusts based on game phase, complexity, and evaluation."""
+def is_position_complex(board, engine, time_limit=1.0):
+    """Detect if the position is complex based on the evaluation spread of legal moves."""
+    return position_complexity(board, engine, time_limit)["eval_range"] > COMPLEX_RANGE  # Complex if evaluation range is wide
+
+def adjust_adaptive_mode(board, engine, args, pool=None):
+    """
+    Enhanced adaptive logic that adjusts based on game phase, complexity, and evaluation.
+
+    The new settings are applied to `engine` and to the speculation `pool`, if given.
+    """
     phase = detect_game_phase(board)
-    analysis = engine.analyse(board, chess.engine.Limit(time=1), info=chess.engine.INFO_SCORE)
-    score = analysis["score"].relative.score(mate_score=10000)  
 
-    complex_position = is_position_complex(board, engine)
+    # Only the middlegame depends on the score; its complexity search's best line gives it
+    if phase == "Middlegame":
+        complexity = position_complexity(board, engine)
+        score = complexity["score"]
+        complex_position = complexity["eval_range"] > COMPLEX_RANGE
 
     # Adjust based on game phase
     if phase == "Opening":
@@ -215,92 +1525,226 @@ def adjust_adaptive_mode(board, engine, args):
                 args.nodestime = 10000
 
     elif phase == "Endgame":
-        print("\n⚪ Endgame: Precision-focused strategy")
+        verdict = tablebase.verdict(board)
+        if verdict:
+            print(f"\n⚪ Endgame: Tablebase {verdict}")
+        else:
+            print("\n⚪ Endgame: Precision-focused strategy")
         args.skill = 20
         args.nodestime = 12000
 
     # Apply updated settings to Stockfish
-    engine.configure({
+    options = {
         "Skill Level": args.skill,
         "nodestime": args.nodestime
-    })
+    }
+    engine.configure(options)
+    if pool is not None:
+        pool.configure(options)
 
 
 # Ensure games directory exists
 os.makedirs("games", exist_ok=True)
 
-def save_game(board, filename):
-    """Save the current game to a PGN file."""
+def save_game(board, filename, ledger=None):
+    """Save the current game (and its move statistics, if given) to a PGN file."""
     game = chess.pgn.Game().from_board(board)
+    if ledger is not None:
+        ledger.annotate(game)
     filepath = f"games/{filename}.pgn"
     with open(filepath, "w") as file:
         file.write(str(game))
+    game_archive.add(filepath, game, board)
+    opening_explorer.add_saved(filepath, game)
+    book_archive.add_saved(filepath, game)
     print(f"💾 Game saved as '{filepath}'")
 
 
-def list_saved_games():
-    """List available saved games in the 'games' directory."""
-    files = [f for f in os.listdir("games") if f.endswith(".pgn")]
-    return files
+class ArchiveBuilder(chess.pgn.GameBuilder):
+    """Builds the game and keeps its final mainline board, so nothing is replayed after parsing."""
 
+    def begin_game(self):
+        super().begin_game()
+        self.board = None
 
-def load_game():
-    """Load a game from saved PGN files with user selection."""
-    games = list_saved_games()
-    if not games:
-        print("❌ No saved games found.")
-        return None
+    def visit_board(self, board):
+        if len(self.variation_stack) == 1:
+            self.board = board
 
-    print("\n📂 Select a saved game to load:")
-    for i, game_file in enumerate(games, 1):
-        print(f"{i}. {game_file}")
+    def result(self):
+        return super().result(), self.board
 
-    while True:
-        try:
-            choice = int(input("Enter the number of the game to load: "))
-            if 1 <= choice <= len(games):
-                selected_game = games[choice - 1]
-                with open(f"games/{selected_game}", "r") as file:
-                    game = chess.pgn.read_game(file)
-                print(f"✅ Loaded game: {selected_game}")
-
-                # Apply all moves from the loaded PGN to set the board state correctly
-                board = game.board()
-                for move in game.mainline_moves():
-                    board.push(move)
-
-                return board
+class GameArchive:
+    """
+    Index of every game under games/, in a SQLite file next to them.
+
+    Each game is one row keyed by file and byte offset (multi-game PGN files
+    get one row per game) with its players, result, date, ply count, final
+    FEN and the file's modification time. Files written by save_game() and
+    save_game_pgn() are added as they are saved; refresh() picks up any
+    other new, changed or deleted file by its size and mtime. Loading seeks
+    straight to the game's offset and parses only that game.
+    """
+
+    def __init__(self, directory="games", path="games/archive.db"):
+        self.directory = directory
+        self.path = path
+        self.db = None
+        self.lock = threading.Lock()  # Saves are indexed from the core's worker threads
+
+    def connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY, size INTEGER, mtime REAL)""")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS games (
+                name TEXT, offset INTEGER, white TEXT, black TEXT, result TEXT, date TEXT,
+                event TEXT, plies INTEGER, fen TEXT, saved REAL, headers TEXT, PRIMARY KEY (name, offset))""")
+        return self.db
+
+    def index_file(self, name, games):
+        """Replace the rows of `name` with `games`, a list of (offset, headers, final board)."""
+        file_path = os.path.join(self.directory, name)
+        stat = os.stat(file_path)
+        rows = [(name, offset, headers.get("White", "?"), headers.get("Black", "?"), headers.get("Result", "*"),
+                 headers.get("Date", "?"), headers.get("Event", "?"), board.ply() if board else 0,
+                 board.fen() if board else None, stat.st_mtime, json.dumps(dict(headers)))
+                for offset, headers, board in games]
+        with self.lock:
+            db = self.connect()
+            db.execute("BEGIN")
+            db.execute("DELETE FROM games WHERE name = ?", (name,))
+            db.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (name, stat.st_size, stat.st_mtime))
+            db.execute("COMMIT")
+
+    def add(self, file_path, game, board):
+        """Index a single-game file that was just written from `game` and its final `board`."""
+        self.index_file(os.path.basename(file_path), [(0, game.headers, board)])
+
+    def scan(self, name):
+        """Parse every game of a PGN file, noting where each one starts."""
+        games = []
+        with open(os.path.join(self.directory, name)) as file:
+            while True:
+                offset = file.tell()
+                parsed = chess.pgn.read_game(file, Visitor=ArchiveBuilder)
+                if parsed is None:
+                    break
+                game, board = parsed
+                games.append((offset, game.headers, board))
+        return games
+
+    def refresh(self):
+        """Index new or changed PGN files and forget deleted ones. Returns the number of files (re)indexed."""
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pgn") and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime)
+
+        with self.lock:
+            known = {name: (size, mtime) for name, size, mtime in self.connect().execute("SELECT * FROM files")}
+            for name in set(known) - set(files):
+                self.db.execute("DELETE FROM games WHERE name = ?", (name,))
+                self.db.execute("DELETE FROM files WHERE name = ?", (name,))
+
+        changed = [name for name, signature in files.items() if known.get(name) != signature]
+        for name in changed:
+            self.index_file(name, self.scan(name))
+        return len(changed)
+
+    def search(self, query="", limit=20):
+        """
+        Games matching every word of `query`, newest first.
+
+        A word like result:1-0 or white:Me matches that field; any other word
+        matches the players, event, date or file name.
+
+        Returns:
+            tuple: (list of rows as dicts, total number of matches)
+        """
+        conditions, values = [], []
+        for word in query.split():
+            field, _, value = word.partition(":")
+            if value and field.lower() in ("white", "black", "result", "date", "event"):
+                conditions.append(f"{field.lower()} LIKE ?")
+                values.append(f"%{value}%")
             else:
-                print("⚠️ Invalid selection. Try again.")
-        except ValueError:
-            print("❌ Please enter a valid number.")
+                conditions.append("(white LIKE ? OR black LIKE ? OR event LIKE ? OR date LIKE ? OR name LIKE ?)")
+                values.extend([f"%{word}%"] * 5)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            db = self.connect()
+            total = db.execute(f"SELECT COUNT(*) FROM games {where}", values).fetchone()[0]
+            cursor = db.execute(f"SELECT * FROM games {where} ORDER BY saved DESC, name DESC, offset DESC LIMIT ?",
+                                values + [limit])
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor], total
 
+    def read(self, entry):
+        """Seek to an indexed game and parse it. Returns (game, final board)."""
+        with open(os.path.join(self.directory, entry["name"])) as file:
+            file.seek(entry["offset"])
+            return chess.pgn.read_game(file, Visitor=ArchiveBuilder)
 
-def evaluate_position(engine, board):
-    """Evaluate the board position using Stockfish."""
-    info = engine.analyse(board, chess.engine.Limit(time=0.5))
-    score = info["score"].white()  # Always get evaluation from White's perspective
-    return score.score(mate_score=100000)  # If mate detected, return a very high score
+game_archive = GameArchive()
 
-def remove_game_statistics(board, last_move, stats):
+def load_game(ledger=None, query=""):
     """
-    Removes the impact of the last move from the game statistics.
-    
-    Args:
-        board: The current board state.
-        last_move: The move object to remove.
-        stats: Dictionary tracking stats for White and Black.
+    Load a saved game, chosen from the archive index (and its move statistics into `ledger`).
+
+    `query` filters the list like GameArchive.search(); another filter can be
+    typed at the prompt instead of a number.
     """
-    # Determine color from the move based on who just played
-    color = "Black" if board.turn == chess.WHITE else "White"
+    indexed = game_archive.refresh()
+    if indexed:
+        print(f"🗂️  Indexed {indexed} new or changed game files")
+
+    while True:
+        games, total = game_archive.search(query)
+        if not games:
+            print(f"❌ No saved games found{f' matching {query!r}' if query else ''}.")
+            return None
 
-    # Check the last recorded result and decrement it
-    if stats[color]["blunders"] > 0:
-        stats[color]["blunders"] -= 1
-    elif stats[color]["mistakes"] > 0:
-        stats[color]["mistakes"] -= 1
-    elif stats[color]["inaccuracies"] > 0:
-        stats[color]["inaccuracies"] -= 1
+        print("\n📂 Select a saved game to load:")
+        for i, entry in enumerate(games, 1):
+            location = entry["name"] if entry["offset"] == 0 else f"{entry['name']} @{entry['offset']}"
+            print(f"{i}. {entry['white']} vs {entry['black']} {entry['result']} "
+                  f"({entry['plies']} plies, {entry['date']}) - {location}")
+        if total > len(games):
+            print(f"   ...and {total - len(games)} older games. Type a filter (e.g. 'Opponent', 'result:1-0') to narrow the list.")
+
+        choice = input("Enter the number of the game to load (or a filter, Enter to cancel): ").strip()
+        if not choice:
+            return None
+        if not choice.isdigit():
+            query = choice
+            continue
+        if not 1 <= int(choice) <= len(games):
+            print("⚠️ Invalid selection. Try again.")
+            continue
+
+        entry = games[int(choice) - 1]
+        try:
+            game, board = game_archive.read(entry)
+        except OSError as error:
+            print(f"❌ Could not read {entry['name']}: {error}")
+            continue
+        print(f"✅ Loaded game: {entry['name']}")
+
+        if ledger is not None and ledger.load(game):
+            print(f"📊 Statistics restored for {len(ledger)} moves")
+        return board if board is not None else game.board()
+
+
+def evaluate_position(engine, board, limit=None):
+    """Evaluate the board position using Stockfish (0.5s search unless another limit is given)."""
+    info = eval_cache.analyse(engine, board, limit or chess.engine.Limit(time=0.5))
+    score = info["score"].white()  # Always get evaluation from White's perspective
+    return score.score(mate_score=100000)  # If mate detected, return a very high score
 
 def update_game_statistics(engine, board, move, stats):
     """
@@ -311,6 +1755,9 @@ def update_game_statistics(engine, board, move, stats):
         board: Current chess board state.
         move: The move just played.
         stats: Dictionary tracking stats for White and Black.
+
+    Returns:
+        str: the category counted for the move, or None.
     """
     player = "White" if board.turn == chess.BLACK else "Black"  # Board turn is after making the move
 
@@ -322,16 +1769,330 @@ def update_game_statistics(engine, board, move, stats):
     # Evaluate after the move
     eval_after = evaluate_position(engine, board)
 
-    # Calculate the drop in centipawn score (negative drop indicates worsening position)
+    category = classify_move(eval_before, eval_after, player)
+    if category:
+        stats[player][category] += 1
+    return category
+
+def classify_move(eval_before, eval_after, player):
+    """
+    Classify a move from the White-relative evaluations around it.
+
+    Returns:
+        str: 'blunders', 'mistakes' or 'inaccuracies' (the stats key), or None for a good move.
+    """
+    # Calculate the drop in centipawn score from the mover's point of view
     score_diff = eval_before - eval_after
+    if player == "Black":
+        score_diff = -score_diff
 
     # Detect type of error
     if score_diff >= 300:
-        stats[player]['blunders'] += 1
+        return "blunders"
     elif score_diff >= 100:
-        stats[player]['mistakes'] += 1
+        return "mistakes"
     elif score_diff >= 50:
-        stats[player]['inaccuracies'] += 1
+        return "inaccuracies"
+    return None
+
+class StatsLedger:
+    """
+    Per-ply record of the game statistics.
+
+    Each classified move keeps its ply, mover, White-relative evaluations
+    before and after it, and its category, in parallel typed arrays. The
+    counters in `stats` are derived from the entries, so undo() takes back
+    exactly what the last move added, without another engine call. The
+    ledger travels with saved games as [%eval] comments plus a StartEval
+    header, so a loaded game resumes its statistics without re-analysis.
+    """
+
+    CATEGORIES = (None, "inaccuracies", "mistakes", "blunders")
+
+    def __init__(self):
+        self.plies = array("H")
+        self.white = array("b")  # 1 when White made the move
+        self.before = array("l")
+        self.after = array("l")
+        self.categories = array("b")  # Index into CATEGORIES
+        self.stats = initialize_game_stats()
+
+    def __len__(self):
+        return len(self.plies)
+
+    def last_eval(self, ply):
+        """White-relative evaluation after `ply` if it is the last entry, else None."""
+        if self.plies and self.plies[-1] == ply:
+            return self.after[-1]
+        return None
+
+    def record(self, ply, player, eval_before, eval_after):
+        """Classify and append one move. Returns its category (stats key) or None."""
+        category = classify_move(eval_before, eval_after, player)
+        self.plies.append(ply)
+        self.white.append(player == "White")
+        self.before.append(eval_before)
+        self.after.append(eval_after)
+        self.categories.append(self.CATEGORIES.index(category))
+        if category:
+            self.stats[player][category] += 1
+        return category
+
+    def undo(self, ply=None):
+        """Remove the last entry (only if it is for `ply`, when given) and its contribution to the counters."""
+        if not self.plies or (ply is not None and self.plies[-1] != ply):
+            return
+        self.plies.pop()
+        self.before.pop()
+        self.after.pop()
+        category = self.CATEGORIES[self.categories.pop()]
+        player = "White" if self.white.pop() else "Black"
+        if category:
+            self.stats[player][category] -= 1
+
+    def clear(self):
+        self.__init__()
+
+    def annotate(self, game):
+        """Write the ledger into a chess.pgn.Game of the same moves."""
+        evals = dict(zip(self.plies, self.after))
+        for ply, node in enumerate(game.mainline(), 1):
+            if ply in evals:
+                node.set_eval(chess.engine.PovScore(chess.engine.Cp(evals[ply]), chess.WHITE))
+        if self.plies:
+            game.headers["StartEval"] = str(self.before[0])
+
+    def load(self, game):
+        """
+        Rebuild the ledger from a game saved with annotate().
+
+        Entries start at the first move with an [%eval] comment and run
+        while the following moves have one. Returns the number of entries.
+        """
+        self.clear()
+        if "StartEval" not in game.headers:
+            return 0
+        eval_before = int(game.headers["StartEval"])
+        turn = game.board().turn
+        for ply, node in enumerate(game.mainline(), 1):
+            player = "White" if turn == chess.WHITE else "Black"
+            turn = not turn
+            score = node.eval()
+            if score is None:
+                if self.plies:
+                    break
+                continue
+            eval_after = score.white().score(mate_score=100000)
+            self.record(ply, player, eval_before, eval_after)
+            eval_before = eval_after
+        return len(self)
+
+    def copy(self):
+        ledger = StatsLedger()
+        for name in ("plies", "white", "before", "after", "categories"):
+            setattr(ledger, name, array(getattr(self, name).typecode, getattr(self, name)))
+        ledger.stats = {player: dict(counts) for player, counts in self.stats.items()}
+        return ledger
+
+class StatsWorker:
+    """
+    Game statistics computed in a background thread.
+
+    Played moves are queued and classified in order on their own engine
+    (ideally a low-priority one) into a StatsLedger, so the suggestion
+    never waits for engine evaluations. A move right after a recorded one
+    reuses that move's evaluation as its own "before". Call drain() before
+    reading the ledger.
+    """
+
+    def __init__(self, engine, ledger, journal=None):
+        self.engine = engine
+        self.ledger = ledger
+        self.journal = journal  # GameJournal that gets every move as it is played, and its evaluation
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="StatsWorker", daemon=True)
+        self.thread.start()
+
+    def record(self, board):
+        """Queue the last move played on `board` for classification."""
+        if self.journal:
+            self.journal.move(board)
+        self.jobs.put(board.copy())
+
+    def backfill(self, board):
+        """
+        Queue the moves on `board` after the ledger's last entry, without journaling them again.
+
+        A resumed game gets back the moves whose evaluation was still pending when the session was killed.
+        """
+        replay = board.root()
+        last = self.ledger.plies[-1] if self.ledger.plies else 0
+        for ply, move in enumerate(board.move_stack, 1):
+            replay.push(move)
+            if ply > last:
+                self.jobs.put(replay.copy())
+        return max(0, len(board.move_stack) - last)
+
+    def undo(self, ply):
+        """Queue the removal of the move at `ply` (kept in order with record())."""
+        if self.journal:
+            self.journal.undo(ply)
+        self.jobs.put(ply)
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if isinstance(job, int):
+                    self.ledger.undo(job)
+                else:
+                    self.classify(job)
+            except Exception as error:
+                print(f"⚠️ Statistics skipped a move: {error}")
+            finally:
+                self.jobs.task_done()
+
+    def classify(self, board):
+        ply = len(board.move_stack)
+        player = "White" if board.turn == chess.BLACK else "Black"  # Board turn is after making the move
+        eval_before = self.ledger.last_eval(ply - 1)
+        if eval_before is None:
+            move = board.pop()
+            eval_before = evaluate_position(self.engine, board)
+            board.push(move)
+        eval_after = evaluate_position(self.engine, board)
+        self.ledger.record(ply, player, eval_before, eval_after)
+        if self.journal:
+            self.journal.evaluation(board, eval_before, eval_after)
+
+    def drain(self):
+        """Wait until every queued move has been classified."""
+        self.jobs.join()
+
+class GameJournal:
+    """
+    Append-only journal of the game in play, so a killed session can resume.
+
+    Every played move is one JSON line (ply, UCI move, timestamp) written as
+    it happens; its evaluation follows in its own line when the StatsWorker
+    has it, and "oops" leaves an undo line. Each line is flushed to the OS at
+    once, which survives the app being killed, and fsynced in batches, which
+    bounds what a power loss can take. A move costs one short line whatever
+    the length of the game. At the end the game is saved as a PGN and the
+    journal is removed.
+    """
+
+    def __init__(self, path="games/journal.jsonl", sync_every=16, sync_interval=2.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.file = None
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+        self.lock = threading.Lock()  # Evaluations are written from the stats worker thread
+
+    def write(self, entry, sync=False):
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            self.unsynced += 1
+            if sync or self.unsynced >= self.sync_every or time.monotonic() - self.synced_at >= self.sync_interval:
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+                self.synced_at = time.monotonic()
+
+    def start(self, board, opponent_color, ledger=None):
+        """Begin a new journal from `board` (with the moves already on it and their statistics in `ledger`)."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.file = open(self.path, "w")
+        root = board.root()
+        evals = []
+        if ledger is not None:
+            evals = [[ply, board.move_stack[ply - 1].uci(), before, after]
+                     for ply, before, after in zip(ledger.plies, ledger.before, ledger.after)
+                     if ply <= len(board.move_stack)]
+        self.write({"event": "start", "time": time.time(), "opponent": opponent_color, "fen": root.fen(),
+                    "moves": [move.uci() for move in board.move_stack], "evals": evals}, sync=True)
+
+    def move(self, board):
+        self.write({"event": "move", "ply": len(board.move_stack), "uci": board.peek().uci(), "time": time.time()})
+
+    def undo(self, ply):
+        self.write({"event": "undo", "ply": ply})
+
+    def evaluation(self, board, eval_before, eval_after):
+        """The evaluations around the last move on `board`, as the StatsLedger recorded them."""
+        self.write({"event": "eval", "ply": len(board.move_stack), "uci": board.peek().uci(),
+                    "before": eval_before, "after": eval_after})
+
+    def replay(self):
+        """
+        Rebuild an unfinished game from the journal.
+
+        Returns:
+            tuple: (board, opponent color, StatsLedger, start time), or None when there is no journal.
+        """
+        try:
+            with open(self.path) as file:
+                lines = file.readlines()
+        except OSError:
+            return None
+
+        board, opponent_color, started, evals = None, None, None, {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by the crash
+            event = entry.get("event")
+            if event == "start":
+                board = chess.Board(entry["fen"])
+                for uci in entry["moves"]:
+                    board.push(chess.Move.from_uci(uci))
+                opponent_color, started = entry["opponent"], entry["time"]
+                evals = {ply: (uci, before, after) for ply, uci, before, after in entry["evals"]}
+            elif board is None:
+                continue
+            elif event == "move":
+                while len(board.move_stack) >= entry["ply"]:
+                    board.pop()
+                board.push(chess.Move.from_uci(entry["uci"]))
+            elif event == "undo":
+                while len(board.move_stack) >= entry["ply"]:
+                    board.pop()
+            elif event == "eval":
+                evals[entry["ply"]] = (entry["uci"], entry["before"], entry["after"])
+        if board is None:
+            return None
+
+        # Keep the evaluations of the moves still on the board (an undone move's may come in late)
+        ledger = StatsLedger()
+        root_turn = board.root().turn
+        for ply in sorted(evals):
+            uci, before, after = evals[ply]
+            if ply > len(board.move_stack) or board.move_stack[ply - 1].uci() != uci:
+                continue
+            player = "White" if (root_turn == chess.WHITE) == (ply % 2 == 1) else "Black"
+            ledger.record(ply, player, before, after)
+        return board, opponent_color, ledger, started
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+
+    def finish(self):
+        """The game is saved as a PGN: the journal is no longer needed."""
+        self.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
 
 def initialize_game_stats():
     """Initialize the stats for both players."""
@@ -375,3 +2136,101 @@ def game_statistics_summary(board, stats, total_moves):
 {result}
     """
     return summary
+
+# Fixed benchmark positions: opening, sharp middlegames, quiet middlegame and endgames
+BENCH_FENS = [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bqk2r/pppp1ppp/2n2n2/2b1p3/2B1P3/3P1N2/PPP2PPP/RNBQK2R w KQkq - 1 5",
+    "r2q1rk1/pp2bppp/2np1n2/4p3/4P1b1/2N1BN2/PPPQBPPP/R3K2R w KQ - 4 9",
+    "r1b2rk1/2q1bppp/p2p1n2/np2p3/3PP3/5N1P/PPBN1PP1/R1BQR1K1 b - - 0 13",
+    "2rq1rk1/pb2bppp/1pn1pn2/2pp4/3P4/1PP1PN2/PB1NBPPP/R2Q1RK1 w - - 3 11",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/5pk1/6p1/3R4/7P/6P1/r4PK1/8 b - - 3 41",
+    "8/8/4kpp1/3p4/p6P/2B4b/6P1/6K1 w - - 0 48",
+]
+
+AUTOTUNE_PROFILE = "games/autotune.json"
+
+# Playstyle presets (mode name -> settings), in the order main.py checks the mode flags
+MODE_PRESETS = {
+    "aggressive": {"skill": 20, "elo": 3190, "threads": 4, "hash": 700, "move_overhead": 10, "nodestime": 10000, "book_selection": "best", "stable_depths": 4, "stable_swing": 20, "search_time": 3.0, "search_depth": 10},
+    "newbie": {"skill": 4, "elo": 1320, "threads": 2, "hash": 700, "move_overhead": 800, "nodestime": 700, "book_selection": "weighted", "stable_depths": 2, "stable_swing": 60, "search_time": 1.5, "search_depth": 10},
+    "intermediate": {"skill": 15, "elo": 2500, "threads": 2, "hash": 512, "move_overhead": 25, "nodestime": 8000, "book_selection": "weighted", "stable_depths": 3, "stable_swing": 30, "search_time": 2.5, "search_depth": 10},
+    "club": {"skill": 10, "elo": 1800, "threads": 2, "hash": 256, "move_overhead": 50, "nodestime": 5000, "book_selection": "weighted", "stable_depths": 3, "stable_swing": 40, "search_time": 2.0, "search_depth": 10},
+    "classical": {"skill": 20, "elo": 3190, "threads": 4, "hash": 700, "move_overhead": 50, "nodestime": 10000, "book_selection": "best", "stable_depths": 6, "stable_swing": 15, "search_time": 8.0, "search_depth": 14},
+    "defensive": {"skill": 15, "elo": 2400, "threads": 2, "hash": 512, "move_overhead": 40, "nodestime": 10000, "book_selection": "best", "stable_depths": 4, "stable_swing": 20, "search_time": 3.0, "search_depth": 10},
+    "gambit": {"skill": 17, "elo": 2700, "threads": 3, "hash": 256, "move_overhead": 15, "nodestime": 10000, "book_selection": "weighted", "stable_depths": 3, "stable_swing": 40, "search_time": 2.5, "search_depth": 10},
+    "adaptive": {"skill": 18, "elo": 2800, "threads": 3, "hash": 768, "move_overhead": 20, "nodestime": 10000, "book_selection": "best", "stable_depths": 4, "stable_swing": 25, "search_time": 3.0, "search_depth": 10},
+}
+
+# The mode presets were written for a 4-thread, 768 MB budget; profiles rescale them
+PRESET_THREADS = 4
+PRESET_HASH = 768
+
+def device_memory_mb():
+    """Physical memory in MB, or None where the platform doesn't report it."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def autotune(engine, fens=BENCH_FENS, depth=14):
+    """
+    Benchmark Threads/Hash combinations on this device.
+
+    Every combination searches each position to `depth` from a cleared hash
+    (a new game per position). Thread counts go up to the CPU count and hash
+    sizes up to a quarter of the physical memory.
+
+    Returns:
+        dict: the profile: device facts, per-combination nps and seconds to
+        depth, and the chosen "threads"/"hash": among settings within 5% of the
+        fastest, the fewest threads and then the largest hash, since a
+        short benchmark can't show what a bigger hash gains over a game.
+    """
+    cpus = os.cpu_count() or 1
+    memory = device_memory_mb()
+    thread_options = sorted({t for t in (1, 2, 4, 8, 16) if t < cpus} | {cpus})
+    hash_options = [h for h in (64, 128, 256, 512, 1024, 2048) if memory is None or h <= memory // 4] or [16]
+
+    results = []
+    print(f"🔬 Autotune: {cpus} CPUs, {memory or '?'} MB memory, {len(fens)} positions to depth {depth}")
+    print(f"{'threads':>7} {'hash MB':>8} {'knps':>8} {'s/pos':>7}")
+    for threads in thread_options:
+        for hash_size in hash_options:
+            engine.configure({"Threads": threads, "Hash": hash_size})
+            elapsed = 0.0
+            nodes = 0
+            for fen in fens:
+                start = time.perf_counter()
+                info = engine.analyse(chess.Board(fen), chess.engine.Limit(depth=depth), game=(threads, hash_size, fen))
+                elapsed += time.perf_counter() - start
+                nodes += info.get("nodes", 0)
+            result = {"threads": threads, "hash": hash_size,
+                      "nps": int(nodes / elapsed) if elapsed else 0, "seconds": elapsed / len(fens)}
+            results.append(result)
+            print(f"{threads:>7} {hash_size:>8} {result['nps'] / 1000:>8.0f} {result['seconds']:>7.2f}")
+
+    fastest = min(result["seconds"] for result in results)
+    best = min((result for result in results if result["seconds"] <= fastest * 1.05),
+               key=lambda result: (result["threads"], -result["hash"]))
+    return {"cpus": cpus, "memory_mb": memory, "depth": depth, "results": results,
+            "threads": best["threads"], "hash": best["hash"], "created": int(time.time())}
+
+def save_profile(profile, path=AUTOTUNE_PROFILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as profile_file:
+        json.dump(profile, profile_file, indent=2)
+
+def load_profile(path=AUTOTUNE_PROFILE):
+    """The saved autotune profile, or None if there is none (or it can't be read)."""
+    try:
+        with open(path) as profile_file:
+            return json.load(profile_file)
+    except (OSError, ValueError):
+        return None
+
+def scale_to_profile(threads, hash_size, profile):
+    """Rescale a preset's Threads/Hash from the reference budget to the tuned one."""
+    return (max(1, round(threads * profile["threads"] / PRESET_THREADS)),
+            max(16, round(hash_size * profile["hash"] / PRESET_HASH)))